@@ -1,12 +1,33 @@
 import os
+import argparse
+import transcript_format
 
 # === PARAMÈTRES ===
-input_directory = "transcriptions"       # Dossier contenant les .txt
+input_directory = "transcriptions"       # Dossier contenant les .txt / .jsonl
 output_file = "verbatim_complet.txt"     # Fichier final
-segment_duration_min = 15                # Pour horodatage approximatif
+segment_duration_min = 30                # Horodatage approximatif si aucune transcription horodatée (.jsonl)
+FORMATS = ["txt", "srt", "vtt"]
 
-# === COMBINAISON & MISE EN FORME ===
-with open(output_file, "w", encoding="utf-8") as out_file:
+
+def _iter_records(input_directory):
+    """Lignes horodatées de tous les segments, dans l'ordre, lues en flux."""
+    for path in transcript_format.segment_jsonl_files(input_directory):
+        yield from transcript_format.read_jsonl(path)
+
+
+def _write_verbatim(records, out_file):
+    """Verbatim structuré avec les horodatages réels, en une seule passe."""
+    current_segment = None
+    for record in records:
+        if record["segment"] != current_segment:
+            current_segment = record["segment"]
+            out_file.write(f"\n=== Segment {current_segment:02d} — à partir de "
+                           f"{transcript_format.format_timestamp(record['start'])[:8]} ===\n\n")
+        out_file.write(f"[{transcript_format.format_timestamp(record['start'])[:8]}] {record['text']}\n")
+
+
+def _write_verbatim_approx(input_directory, out_file, segment_duration_min):
+    """Ancien format : horodatage approximatif déduit de la durée des segments."""
     for idx, filename in enumerate(sorted(os.listdir(input_directory))):
         if filename.endswith(".txt"):
             segment_number = idx + 1
@@ -27,4 +48,40 @@ with open(output_file, "w", encoding="utf-8") as out_file:
                 out_file.write(formatted)
                 out_file.write("\n\n")
 
-print(f"📄 Verbatim structuré généré dans : {output_file}")
+
+def concatenate(input_directory=input_directory, output_file=output_file, fmt="txt",
+                segment_duration_min=segment_duration_min):
+    """
+    Combine les transcriptions de input_directory en un seul fichier (txt, srt ou vtt).
+    Les horodatages réels des fichiers .jsonl sont utilisés quand ils existent.
+    """
+    has_timestamps = bool(transcript_format.segment_jsonl_files(input_directory))
+    if fmt != "txt" and not has_timestamps:
+        raise ValueError(f"Le format {fmt} nécessite des transcriptions horodatées (.jsonl) dans {input_directory}")
+
+    # === COMBINAISON & MISE EN FORME ===
+    with open(output_file, "w", encoding="utf-8") as out_file:
+        if fmt == "srt":
+            transcript_format.write_srt(_iter_records(input_directory), out_file)
+        elif fmt == "vtt":
+            transcript_format.write_vtt(_iter_records(input_directory), out_file)
+        elif has_timestamps:
+            _write_verbatim(_iter_records(input_directory), out_file)
+        else:
+            _write_verbatim_approx(input_directory, out_file, segment_duration_min)
+
+    print(f"📄 Verbatim structuré généré dans : {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine les transcriptions en un verbatim structuré.")
+    parser.add_argument("-i", "--input", default=input_directory,
+                        help=f"Dossier des transcriptions (défaut: {input_directory})")
+    parser.add_argument("-o", "--output", default=output_file, help=f"Fichier final (défaut: {output_file})")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="txt", help="Format de sortie (défaut: txt)")
+    args = parser.parse_args()
+    concatenate(args.input, args.output, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,521 @@
 import os
+import json
+import subprocess
 import numpy as np
-import librosa
 import soundfile as sf
 import argparse
-from moviepy.video.io.VideoFileClip import VideoFileClip
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 
-def split_audio(input_path: str, segment_duration_min: int = 30, output_directory: str = "segments_audio") -> list[str]:
+import metrics
+import pcm_store
+
+VIDEO_EXTENSIONS = [".mp4", ".avi", ".mkv", ".mov"]
+VIDEO_BACKENDS = ["ffmpeg", "moviepy"]
+BOUNDARY_MODES = ["fixed", "silence"]
+MANIFEST_NAME = "segments_manifest.json"
+
+
+def _probe_audio(audio_path: str) -> tuple[int, float]:
+    """Retourne (fréquence d'échantillonnage, durée en secondes) via ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "stream=sample_rate:format=duration",
+            "-of", "json", audio_path,
+        ],
+        capture_output=True, check=True, text=True,
+    )
+    info = json.loads(result.stdout)
+    sr = int(info["streams"][0]["sample_rate"])
+    duration_sec = float(info["format"]["duration"])
+    return sr, duration_sec
+
+
+def _iter_blocks_soundfile(audio_path: str, segment_duration_sec: float):
+    """Lit le fichier bloc par bloc avec soundfile (un bloc = un segment, en mono)."""
+    with sf.SoundFile(audio_path) as f:
+        frames_per_segment = int(segment_duration_sec * f.samplerate)
+        while True:
+            block = f.read(frames_per_segment, dtype="float32", always_2d=True)
+            if block.shape[0] == 0:
+                break
+            yield block.mean(axis=1)
+
+
+def _iter_blocks_ffmpeg(audio_path: str, sr: int, segment_duration_sec: float):
     """
-    Découpe un fichier audio (mp3, wav, etc.) ou vidéo (mp4, avi, etc.) en segments MP3 de durée fixe.
-    - Si le fichier est une vidéo, l'audio est extrait automatiquement.
-    - Si le fichier est un audio, il est traité directement.
-    Les segments sont exportés dans le dossier de sortie.
+    Décode le fichier via un pipe ffmpeg (PCM float32 mono) un segment à la fois.
+    Si ffmpeg échoue (fichier corrompu, flux illisible), RuntimeError avec son message d'erreur
+    à la fin du flux, plutôt que des segments tronqués ; sauf si le générateur est fermé avant.
+    """
+    frames_per_segment = int(segment_duration_sec * sr)
+    bytes_per_segment = frames_per_segment * 4
+    # stderr dans un fichier temporaire : un pipe non lu pourrait bloquer ffmpeg
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [
+            "ffmpeg", "-v", "error", "-i", audio_path, "-vn",
+            "-ac", "1", "-ar", str(sr), "-f", "f32le", "pipe:1",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+    )
+    try:
+        while True:
+            data = process.stdout.read(bytes_per_segment)
+            if not data:
+                break
+            # Tronquer un éventuel échantillon incomplet en fin de flux
+            data = data[: len(data) - len(data) % 4]
+            yield np.frombuffer(data, dtype=np.float32)
+        returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg a échoué (code {returncode}) sur {audio_path}: {message}")
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr.close()
+
+
+def _open_audio_stream(audio_path: str, segment_duration_sec: float):
+    """
+    Ouvre un flux de segments audio sans charger tout le fichier en mémoire.
+    Retourne (sr, nombre total d'échantillons, générateur de segments mono float32).
+    soundfile est utilisé quand libsndfile sait lire le format, sinon ffmpeg.
+    """
+    try:
+        info = sf.info(audio_path)
+        return info.samplerate, info.frames, _iter_blocks_soundfile(audio_path, segment_duration_sec)
+    except RuntimeError:
+        sr, duration_sec = _probe_audio(audio_path)
+        total_frames = int(duration_sec * sr)
+        return sr, total_frames, _iter_blocks_ffmpeg(audio_path, sr, segment_duration_sec)
+
+
+def _frame_rms(signal: np.ndarray, frame_len: int) -> np.ndarray:
+    """Énergie RMS par trame de `frame_len` échantillons (calcul vectorisé)."""
+    n_frames = len(signal) // frame_len
+    frames = signal[: n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+
+
+def _snap_to_silence(blocks, sr: int, segment_duration_sec: float, tolerance_sec: float,
+                     frame_sec: float = 0.05, threshold_db: float = -40.0):
+    """
+    Recoupe un flux de blocs pour placer chaque coupure sur la trame la moins énergétique
+    à ± `tolerance_sec` de la coupure nominale, si cette trame est un silence (RMS sous
+    `threshold_db` dBFS) ; sinon la coupure nominale est gardée, pour ne pas raccourcir un
+    segment sans bénéfice. Produit (échantillon de début, segment).
+    Au plus un segment plus la fenêtre de tolérance est gardé en mémoire.
+    """
+    segment_frames = int(segment_duration_sec * sr)
+    tolerance_frames = int(tolerance_sec * sr)
+    frame_len = max(1, int(frame_sec * sr))
+    buffer = np.zeros(0, dtype=np.float32)
+    start_sample = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(buffer) < segment_frames + tolerance_frames:
+            block = next(blocks, None)
+            if block is None:
+                exhausted = True
+            else:
+                buffer = np.concatenate((buffer, block))
+        if len(buffer) == 0:
+            return
+        if exhausted and len(buffer) <= segment_frames + tolerance_frames:
+            yield start_sample, buffer
+            return
+
+        window_start = max(0, segment_frames - tolerance_frames)
+        window = buffer[window_start: segment_frames + tolerance_frames]
+        if len(window) < frame_len:
+            cut = segment_frames
+        else:
+            rms = _frame_rms(window, frame_len)
+            quietest = int(np.argmin(rms))
+            if 20 * np.log10(rms[quietest] + 1e-10) < threshold_db:
+                cut = window_start + quietest * frame_len + frame_len // 2
+            else:
+                cut = segment_frames
+        yield start_sample, buffer[:cut]
+        buffer = buffer[cut:]
+        start_sample += cut
+
+
+def _compress_silences(segment: np.ndarray, sr: int, max_silence_sec: float,
+                       threshold_db: float = -40.0, frame_sec: float = 0.05) -> tuple[np.ndarray, int, list]:
+    """
+    Raccourcit à `max_silence_sec` chaque silence (RMS sous `threshold_db` dBFS) plus long.
+    max_silence_sec=0 supprime complètement les silences détectés.
+    Retourne (segment compressé, nombre d'échantillons retirés, coupes) où chaque coupe est
+    [position dans le segment compressé, échantillons retirés à cette position].
+    """
+    frame_len = max(1, int(frame_sec * sr))
+    rms = _frame_rms(segment, frame_len)
+    silent = 20 * np.log10(rms + 1e-10) < threshold_db
+
+    # Débuts/fins des plages de trames silencieuses
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    run_starts, run_ends = edges[::2], edges[1::2]
+
+    max_frames = int(max_silence_sec / frame_sec)
+    head = max_frames // 2
+    keep = np.ones(len(segment), dtype=bool)
+    spans = []
+    removed = 0
+    for run_start, run_end in zip(run_starts, run_ends):
+        if run_end - run_start > max_frames:
+            cut_start = int(run_start + head) * frame_len
+            cut_end = int(run_end - (max_frames - head)) * frame_len
+            keep[cut_start:cut_end] = False
+            spans.append([cut_start - removed, cut_end - cut_start])
+            removed += cut_end - cut_start
+
+    return (segment[keep] if removed else segment), removed, spans
+
+
+def _write_manifest(output_directory: str, manifest: list) -> None:
+    """Réécrit le manifeste des segments de façon atomique (lisible pendant le découpage)."""
+    path = os.path.join(output_directory, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_segment_info(segment_path: str) -> dict | None:
+    """Entrée du manifeste (segments_manifest.json) correspondant à un segment, ou None."""
+    path = os.path.join(os.path.dirname(segment_path), MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    name = os.path.basename(segment_path)
+    return next((entry for entry in manifest if os.path.basename(entry["path"]) == name), None)
+
+
+def _extract_audio_moviepy(input_path: str, output_directory: str) -> str:
+    """Ancienne extraction : écrit toute la piste audio de la vidéo dans un WAV temporaire."""
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    audio_path = os.path.join(output_directory, "_temp_audio.wav")
+    with VideoFileClip(input_path) as video:
+        video.audio.write_audiofile(audio_path, codec="pcm_s16le")
+    return audio_path
+
+
+def _encode_segment(output_path: str, segment: np.ndarray, sr: int) -> str:
+    """Encode un segment en MP3 (exécuté dans un processus du pool)."""
+    sf.write(output_path, segment, sr, format='MP3')
+    return output_path
+
+
+def iter_split_audio(input_path: str, segment_duration_min: int = 30, output_directory: str = "segments_audio",
+                     video_backend: str = "ffmpeg", workers: int = 1, boundary: str = "fixed",
+                     boundary_tolerance_sec: float = 30.0, max_silence_sec: float | None = None,
+                     scratch_directory: str | None = None, pcm: bool = False, export_mp3: bool = True,
+                     pcm_dtype: str = "float32"):
     """
+    Version générateur de split_audio : produit le chemin de chaque segment dès qu'il
+    est écrit sur disque, dans l'ordre, pour que l'étape suivante démarre sans attendre
+    la fin du découpage.
+    """
+    if not pcm and not export_mp3:
+        raise ValueError("Sans export MP3, l'intermédiaire PCM (pcm=True) est nécessaire")
+    if pcm_dtype not in pcm_store.PCM_DTYPES:
+        raise ValueError(f"Format PCM inconnu: {pcm_dtype} (choix: {', '.join(pcm_store.PCM_DTYPES)})")
+    if video_backend not in VIDEO_BACKENDS:
+        raise ValueError(f"Backend vidéo inconnu: {video_backend} (choix: {', '.join(VIDEO_BACKENDS)})")
+    if boundary not in BOUNDARY_MODES:
+        raise ValueError(f"Mode de coupure inconnu: {boundary} (choix: {', '.join(BOUNDARY_MODES)})")
+    segment_duration_sec = segment_duration_min * 60
+    # Au-delà de la moitié d'un segment, une coupure pourrait tomber juste après la précédente
+    if boundary == "silence" and not 0 <= boundary_tolerance_sec < segment_duration_sec / 2:
+        raise ValueError(f"Tolérance de recalage invalide: {boundary_tolerance_sec} s "
+                         f"(doit être positive et inférieure à la moitié d'un segment, {segment_duration_sec / 2:g} s)")
+
     os.makedirs(output_directory, exist_ok=True)
     file_ext = os.path.splitext(input_path)[1].lower()
     audio_path = input_path
 
-    # Si c'est une vidéo, extraire l'audio temporairement
-    if file_ext in [".mp4", ".avi", ".mkv", ".mov"]:
-        print(f"Extraction de l'audio depuis la vidéo {input_path}...")
-        with VideoFileClip(input_path) as video:
-            audio_path = os.path.join(output_directory, "_temp_audio.wav")
-            video.audio.write_audiofile(audio_path, codec="pcm_s16le")
+    if file_ext in VIDEO_EXTENSIONS and video_backend == "moviepy":
+        print(f"Extraction de l'audio depuis la vidéo {input_path} (moviepy)...")
+        audio_path = _extract_audio_moviepy(input_path, scratch_directory or output_directory)
+
+    # Ouvrir l'audio en streaming
+    print("Ouverture du flux audio...")
+    if pcm:
+        # Décodage unique en 16 kHz mono (format d'entrée de Whisper) : l'intermédiaire PCM
+        # est lu tel quel à la transcription
+        print(f"Décodage de {audio_path} en PCM 16 kHz mono...")
+        sr = pcm_store.SAMPLE_RATE
+        _, duration_sec = _probe_audio(audio_path)
+        total_frames = int(duration_sec * sr)
+        blocks = _iter_blocks_ffmpeg(audio_path, sr, segment_duration_sec)
+    elif file_ext in VIDEO_EXTENSIONS and video_backend == "ffmpeg":
+        print(f"Décodage direct de la piste audio de la vidéo {input_path}...")
+        sr, duration_sec = _probe_audio(input_path)
+        total_frames = int(duration_sec * sr)
+        blocks = _iter_blocks_ffmpeg(input_path, sr, segment_duration_sec)
     else:
-        print(f"Traitement direct du fichier audio {input_path}...")
+        if audio_path == input_path:
+            print(f"Traitement direct du fichier audio {input_path}...")
+        sr, total_frames, blocks = _open_audio_stream(audio_path, segment_duration_sec)
+    total_duration_sec = total_frames / sr
 
-    # Charger l'audio
-    print("Chargement de l'audio...")
-    audio, sr = librosa.load(audio_path, sr=None, mono=True)
-    total_duration_sec = audio.shape[0] / sr
-    segment_duration_sec = segment_duration_min * 60
-    num_segments = int(np.ceil(total_duration_sec / segment_duration_sec))
+    if boundary == "silence":
+        # Le dernier segment absorbe jusqu'à la tolérance : nombre estimé, corrigé au fil du découpage
+        num_segments = max(1, int(np.ceil((total_duration_sec - boundary_tolerance_sec) / segment_duration_sec)))
+        cuts = _snap_to_silence(iter(blocks), sr, segment_duration_sec, boundary_tolerance_sec)
+    else:
+        num_segments = int(np.ceil(total_duration_sec / segment_duration_sec))
+        segment_frames = int(segment_duration_sec * sr)
+        cuts = ((i * segment_frames, segment) for i, segment in enumerate(blocks))
+    approx = "~" if boundary == "silence" else ""
 
-    print(f"Découpage en {num_segments} segments de {segment_duration_min} minutes...")
+    print(f"Découpage en {approx}{num_segments} segments de {segment_duration_min} minutes...")
     segments_paths = []
-    
+    manifest = []
+    removed_total = 0
+
     # Import tqdm pour la barre de progression
     from tqdm import tqdm
-    
-    with tqdm(total=num_segments, desc="Découpage audio", unit="segment") as pbar:
-        for i in range(num_segments):
-            start_sec = i * segment_duration_sec
-            end_sec = min((i + 1) * segment_duration_sec, total_duration_sec)
-            start_sample = int(start_sec * sr)
-            end_sample = int(end_sec * sr)
-            segment = audio[start_sample:end_sample]
-            output_path = os.path.join(output_directory, f"segment_{i+1:02d}.mp3")
-            pbar.set_description(f"Découpage du segment {i+1}/{num_segments}")
-            sf.write(output_path, segment, sr, format='MP3')
-            segments_paths.append(output_path)
-            pbar.update(1)
+
+    pcm_file = None
+
+    def prepare(i, start_sample, segment):
+        """
+        Compresse les silences si demandé, ajoute le segment au fichier PCM et l'enregistre
+        dans le manifeste. Sans MP3, le chemin du segment (.pcm) n'est qu'un nom désignant
+        sa position dans le fichier PCM.
+        """
+        nonlocal removed_total
+        output_path = os.path.join(output_directory, f"segment_{i+1:02d}.{'mp3' if export_mp3 else 'pcm'}")
+        end_sample = start_sample + len(segment)
+        removed, spans = 0, []
+        if max_silence_sec is not None:
+            segment, removed, spans = _compress_silences(segment, sr, max_silence_sec)
+            removed_total += removed
+        entry = {
+            "index": i + 1,
+            "path": output_path,
+            "sample_rate": sr,
+            "start_sample": start_sample,
+            "end_sample": end_sample,
+            "removed_silence_samples": removed,
+            "removed_spans": spans,
+        }
+        if pcm_file is not None:
+            entry["pcm"] = pcm_store.append_segment(pcm_file, segment, pcm_dtype)
+        manifest.append(entry)
+        return output_path, segment
+
+    def advance(pbar, done):
+        pbar.set_description(f"Découpage du segment {done}/{approx}{num_segments}")
+        if done > pbar.total:
+            pbar.total = done
+        pbar.update(1)
+
+    # En pipeline, la durée de l'étape inclut l'attente de l'étape suivante ;
+    # segment_seconds ne mesure que le découpage de chaque segment
+    with ExitStack() as resources, metrics.stage("split") as stage_info, \
+            tqdm(total=num_segments, desc="Découpage audio", unit="segment") as pbar:
+        stage_info.update(audio_sec=round(total_duration_sec, 3), segments=num_segments, workers=workers)
+        if pcm:
+            pcm_file = resources.enter_context(open(os.path.join(output_directory, pcm_store.PCM_NAME), "wb"))
+        if workers <= 1 or not export_mp3:
+            segment_start = time.perf_counter()
+            for i, (start_sample, segment) in enumerate(cuts):
+                output_path, segment = prepare(i, start_sample, segment)
+                if export_mp3:
+                    _encode_segment(output_path, segment, sr)
+                segments_paths.append(output_path)
+                metrics.observe("segment_seconds", time.perf_counter() - segment_start, {"segment": i + 1},
+                                stage="split")
+                advance(pbar, i + 1)
+                _write_manifest(output_directory, manifest[:len(segments_paths)])
+                yield output_path
+                segment_start = time.perf_counter()
+        else:
+            # Fenêtre bornée de tâches en cours, récoltées dans l'ordre des segments
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for i, (start_sample, segment) in enumerate(cuts):
+                    output_path, segment = prepare(i, start_sample, segment)
+                    pending.append(executor.submit(_encode_segment, output_path, segment, sr))
+                    if len(pending) >= workers:
+                        segments_paths.append(pending.popleft().result())
+                        advance(pbar, len(segments_paths))
+                        _write_manifest(output_directory, manifest[:len(segments_paths)])
+                        yield segments_paths[-1]
+                while pending:
+                    segments_paths.append(pending.popleft().result())
+                    advance(pbar, len(segments_paths))
+                    _write_manifest(output_directory, manifest[:len(segments_paths)])
+                    yield segments_paths[-1]
+        # Nombre réel (différent de l'estimation avec le recalage sur les silences)
+        stage_info["segments"] = len(segments_paths)
+        pbar.total = len(segments_paths)
+        pbar.refresh()
+
+    _write_manifest(output_directory, manifest)
 
     # Nettoyage du fichier temporaire
     if audio_path != input_path and os.path.exists(audio_path):
         os.remove(audio_path)
 
+    if removed_total:
+        print(f"🔇 {removed_total / sr:.1f} s de silence retirées avant transcription")
     print(f"\n✅ Tous les segments ont été exportés dans {output_directory}!")
-    return segments_paths
+
+
+def split_audio(input_path: str, segment_duration_min: int = 30, output_directory: str = "segments_audio",
+                video_backend: str = "ffmpeg", workers: int = 1, boundary: str = "fixed",
+                boundary_tolerance_sec: float = 30.0, max_silence_sec: float | None = None,
+                scratch_directory: str | None = None, pcm: bool = False, export_mp3: bool = True,
+                pcm_dtype: str = "float32") -> list[str]:
+    """
+    Découpe un fichier audio (mp3, wav, etc.) ou vidéo (mp4, avi, etc.) en segments MP3 de durée fixe.
+    - Si le fichier est une vidéo, la piste audio est décodée directement depuis le conteneur
+      par un pipe ffmpeg (video_backend="ffmpeg"), sans WAV temporaire.
+      video_backend="moviepy" conserve l'ancienne extraction via un WAV temporaire.
+    - Si le fichier est un audio, il est traité directement.
+    Les segments sont exportés dans le dossier de sortie.
+    L'audio est lu en streaming, un segment à la fois : la mémoire utilisée dépend
+    de la durée d'un segment et non de celle du fichier.
+    Avec workers > 1, les segments sont encodés en parallèle dans un pool de processus
+    (au plus `workers` segments en mémoire) ; noms, ordre et chemins retournés sont inchangés.
+    Avec boundary="silence", chaque coupure est déplacée vers la zone la plus calme à
+    ± boundary_tolerance_sec de la coupure nominale, pour ne pas couper un mot (si cette
+    zone est un silence ; sinon la coupure nominale est gardée).
+    Avec max_silence_sec, les silences plus longs sont raccourcis à cette durée (0 = supprimés).
+    Le manifeste segments_manifest.json indique l'échantillon réel de début/fin de chaque segment
+    (et les silences retirés) ; il est mis à jour après chaque segment écrit.
+    Les fichiers temporaires vont dans scratch_directory (par défaut le dossier de sortie).
+    Avec pcm, l'audio est décodé une seule fois en 16 kHz mono et écrit dans audio_16k.pcm
+    (pcm_dtype float32 ou int16), la position de chaque segment étant notée dans le manifeste :
+    la transcription le lit sans décodage (pcm_store). L'export MP3 (alors en 16 kHz) devient
+    optionnel (export_mp3=False : chemins segment_XX.pcm, sans fichier propre).
+    """
+    return list(iter_split_audio(input_path, segment_duration_min, output_directory, video_backend, workers,
+                                 boundary, boundary_tolerance_sec, max_silence_sec, scratch_directory,
+                                 pcm, export_mp3, pcm_dtype))
+
+
+def benchmark_video_backends(input_path: str, segment_duration_min: int = 30) -> dict:
+    """
+    Compare l'ancien chemin moviepy (WAV temporaire) au décodage direct ffmpeg.
+    Retourne le temps de chaque backend et les octets d'E/S temporaires évités
+    (écriture puis relecture du WAV).
+    """
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        wav_path = _extract_audio_moviepy(input_path, tmp_dir)
+        temp_bytes = os.path.getsize(wav_path)
+        split_audio(wav_path, segment_duration_min, tmp_dir)
+        results["moviepy_sec"] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        split_audio(input_path, segment_duration_min, tmp_dir, video_backend="ffmpeg")
+        results["ffmpeg_sec"] = time.perf_counter() - start
+
+    results["temp_io_bytes_avoided"] = 2 * temp_bytes
+
+    print("\n=== BENCHMARK EXTRACTION VIDÉO ===")
+    print(f"moviepy + WAV temporaire : {results['moviepy_sec']:.1f} s")
+    print(f"ffmpeg (pipe direct)     : {results['ffmpeg_sec']:.1f} s")
+    print(f"E/S temporaires évitées  : {results['temp_io_bytes_avoided'] / 1e6:.1f} Mo")
+    return results
+
+
+def _write_synthetic_audio(path: str, duration_sec: float, sr: int = 16000) -> None:
+    """Écrit un signal synthétique (sinusoïdes + bruit) par blocs d'une minute."""
+    rng = np.random.default_rng(0)
+    block_frames = 60 * sr
+    total_frames = int(duration_sec * sr)
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as f:
+        for start in range(0, total_frames, block_frames):
+            n = min(block_frames, total_frames - start)
+            t = (start + np.arange(n)) / sr
+            block = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(n)
+            f.write(block.astype(np.float32))
+
+
+def benchmark_workers(hours: float = 3.0, max_workers: int | None = None, segment_duration_min: int = 30) -> dict:
+    """
+    Mesure le temps de découpage d'un signal synthétique de `hours` heures
+    avec 1, 2, 4... jusqu'à `max_workers` processus d'encodage.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2 ** k for k in range(1, max_workers.bit_length()) if 2 ** k < max_workers})
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wav_path = os.path.join(tmp_dir, "synthetic.wav")
+        print(f"Génération d'un signal synthétique de {hours} h...")
+        _write_synthetic_audio(wav_path, hours * 3600)
+        for n in counts:
+            output_directory = os.path.join(tmp_dir, f"workers_{n}")
+            start = time.perf_counter()
+            split_audio(wav_path, segment_duration_min, output_directory, workers=n)
+            results[n] = time.perf_counter() - start
+
+    print("\n=== BENCHMARK ENCODAGE PARALLÈLE ===")
+    for n, elapsed in results.items():
+        print(f"{n:>3} processus : {elapsed:7.1f} s  (accélération x{results[1] / elapsed:.2f})")
+    return results
 
 
 def main():
     parser = argparse.ArgumentParser(description="Découpe un fichier vidéo/audio en segments MP3.")
-    parser.add_argument("input_path", help="Chemin du fichier vidéo ou audio à découper")
+    parser.add_argument("input_path", nargs="?", help="Chemin du fichier vidéo ou audio à découper")
     parser.add_argument("-d", "--duration", type=int, default=30, help="Durée des segments en minutes (défaut: 30)")
     parser.add_argument("-o", "--output", default="segments_audio", help="Dossier de sortie (défaut: segments_audio)")
+    parser.add_argument("--video-backend", choices=VIDEO_BACKENDS, default="ffmpeg",
+                        help="Extraction de l'audio des vidéos (défaut: ffmpeg)")
+    parser.add_argument("--boundary", choices=BOUNDARY_MODES, default="fixed",
+                        help="Coupures à durée fixe ou recalées sur les silences (défaut: fixed)")
+    parser.add_argument("--tolerance", type=float, default=30.0,
+                        help="Fenêtre de recherche d'un silence autour de chaque coupure, en secondes, "
+                             "inférieure à la moitié d'un segment (défaut: 30)")
+    parser.add_argument("--max-silence", type=float, default=None,
+                        help="Raccourcit les silences plus longs à cette durée en secondes (0 = supprimés)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Nombre de processus d'encodage des segments (défaut: 1)")
+    parser.add_argument("--pcm", action="store_true",
+                        help="Audio 16 kHz mono dans audio_16k.pcm, lu sans décodage à la transcription")
+    parser.add_argument("--pcm-dtype", choices=pcm_store.PCM_DTYPES, default="float32",
+                        help="Format de l'intermédiaire PCM (défaut: float32, lu sans copie)")
+    parser.add_argument("--no-mp3", action="store_true", help="Avec --pcm, ne pas exporter les segments en MP3")
+    parser.add_argument("--bench-video", action="store_true",
+                        help="Compare les backends d'extraction vidéo au lieu de découper")
+    parser.add_argument("--bench-workers", type=float, metavar="HEURES",
+                        help="Compare 1 à N processus (--workers) sur un signal synthétique de HEURES heures")
     args = parser.parse_args()
-    split_audio(args.input_path, args.duration, args.output)
+    if args.bench_workers:
+        benchmark_workers(args.bench_workers, args.workers if args.workers > 1 else None, args.duration)
+        return
+    if not args.input_path:
+        parser.error("input_path est requis")
+    if args.bench_video:
+        benchmark_video_backends(args.input_path, args.duration)
+        return
+    split_audio(args.input_path, args.duration, args.output, video_backend=args.video_backend,
+                workers=args.workers, boundary=args.boundary, boundary_tolerance_sec=args.tolerance,
+                max_silence_sec=args.max_silence, pcm=args.pcm or args.no_mp3, export_mp3=not args.no_mp3,
+                pcm_dtype=args.pcm_dtype)
 
 if __name__ == "__main__":
     main()
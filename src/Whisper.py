@@ -1,29 +1,68 @@
 import os
-import whisper
+import argparse
+import json
+import whisper_models
+import transcript_format
+from Split import MANIFEST_NAME, read_segment_info
+from transcription_cache import transcribe_cached
 
 # === PARAMÈTRES ===
 input_directory = "segments_audio"  # Dossier où sont les MP3
 output_directory = "transcriptions"
 model_size = "base"  # Choix du modèle : tiny, base, small, medium, large
 
-# === PRÉPARATION ===
-os.makedirs(output_directory, exist_ok=True)
-model = whisper.load_model(model_size)
-
-# === TRANSCRIPTION DE TOUS LES FICHIERS MP3 ===
-for filename in sorted(os.listdir(input_directory)):
-    if filename.endswith(".mp3"):
-        audio_path = os.path.join(input_directory, filename)
-        result = model.transcribe(audio_path, language="fr")
-        
-        # Nom de fichier sans extension
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_directory, f"{base_name}.txt")
-        
-        # Sauvegarde de la transcription
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(result["text"])
-        
-        print(f"✅ Transcription enregistrée : {output_path}")
-
-print("🎯 Toutes les transcriptions sont terminées.")
+
+def transcribe_directory(input_directory=input_directory, output_directory=output_directory, model_size=model_size,
+                         backend=None):
+    """Transcrit tous les segments (MP3 ou intermédiaire PCM) de input_directory dans output_directory."""
+    # === PRÉPARATION ===
+    os.makedirs(output_directory, exist_ok=True)
+    # Modèle partagé via le registre (chargé une seule fois par processus)
+    model = whisper_models.get_model(model_size, backend=backend)
+
+    # Segments sans MP3 (découpage avec --pcm --no-mp3) : noms .pcm lus dans le manifeste
+    filenames = sorted(os.listdir(input_directory))
+    manifest_path = os.path.join(input_directory, MANIFEST_NAME)
+    if not any(name.endswith(".mp3") for name in filenames) and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            filenames = [os.path.basename(entry["path"]) for entry in json.load(f)]
+
+    # === TRANSCRIPTION DE TOUS LES SEGMENTS ===
+    for filename in filenames:
+        if filename.endswith((".mp3", ".pcm")):
+            audio_path = os.path.join(input_directory, filename)
+            # Les segments déjà transcrits sont relus depuis le cache disque
+            result = transcribe_cached(model, audio_path, model_size, "fr")
+            
+            # Nom de fichier sans extension
+            base_name = os.path.splitext(filename)[0]
+            output_path = os.path.join(output_directory, f"{base_name}.txt")
+            
+            # Sauvegarde de la transcription
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(result["text"])
+
+            # Version horodatée (temps absolus d'après le manifeste de découpage)
+            index = int(base_name.rsplit("_", 1)[-1]) if base_name.rsplit("_", 1)[-1].isdigit() else 0
+            records = transcript_format.timed_records(index, result["segments"], read_segment_info(audio_path))
+            transcript_format.write_jsonl(os.path.join(output_directory, f"{base_name}.jsonl"), records)
+            
+            print(f"✅ Transcription enregistrée : {output_path}")
+
+    print("🎯 Toutes les transcriptions sont terminées.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcrit tous les segments MP3 d'un dossier.")
+    parser.add_argument("-i", "--input", default=input_directory, help=f"Dossier des segments (défaut: {input_directory})")
+    parser.add_argument("-o", "--output", default=output_directory,
+                        help=f"Dossier des transcriptions (défaut: {output_directory})")
+    parser.add_argument("-m", "--model", default=model_size, help=f"Taille du modèle (défaut: {model_size})")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8, faster-whisper ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    args = parser.parse_args()
+    transcribe_directory(args.input, args.output, args.model, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Moteurs de transcription interchangeables.
+Chaque moteur est chargé par whisper_models.get_model et expose la même interface que
+openai-whisper : model.transcribe(audio, language=..., **options) retourne
+{"text", "segments": [{"start", "end", "text", ...}], "language"}.
+
+- "whisper" : openai-whisper (float32 sur CPU, float16 possible sur GPU)
+- "whisper-int8" : openai-whisper dont les couches linéaires sont quantifiées en int8 (torch, CPU)
+- "faster-whisper" : CTranslate2 en int8 sur CPU (pip install faster-whisper)
+
+Le moteur par défaut se choisit avec la variable d'environnement ASR_BACKEND.
+"""
+
+import argparse
+import os
+import re
+import time
+import unicodedata
+
+BACKENDS = ["whisper", "whisper-int8", "faster-whisper"]
+DEFAULT_BACKEND = os.environ.get("ASR_BACKEND", "whisper")
+SAMPLE_RATE = 16000
+
+
+def uses_torch(backend: str) -> bool:
+    return backend != "faster-whisper"
+
+
+def default_device(backend: str) -> str:
+    if backend == "whisper-int8":
+        # La quantification dynamique de torch ne s'exécute que sur CPU
+        return "cpu"
+    if backend == "faster-whisper":
+        import ctranslate2
+
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _load_whisper(size: str, device: str, dtype: str):
+    import warnings
+    # Supprimer l'avertissement FP16 sur CPU (Whisper utilise automatiquement FP32)
+    warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
+    import whisper
+
+    model = whisper.load_model(size, device=device)
+    if dtype == "float16" and device != "cpu":
+        model = model.half()
+    return model
+
+
+def _load_whisper_int8(size: str, device: str, dtype: str):
+    import torch
+
+    model = _load_whisper(size, "cpu", "float32")
+    # Les couches de Whisper sont une sous-classe de nn.Linear que quantize_dynamic ne reconnaît pas ;
+    # leur forward ne fait que convertir le dtype des poids, inutile en float32
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class FasterWhisperModel:
+    """Adapte faster-whisper à l'interface de sortie d'openai-whisper."""
+
+    def __init__(self, size: str, device: str, dtype: str):
+        from faster_whisper import WhisperModel
+
+        if device == "cpu":
+            compute_type = "int8"
+        else:
+            compute_type = "float16" if dtype == "float16" else "int8_float16"
+        # cpu_threads=0 : OMP_NUM_THREADS ou 4 threads (voir transcribe_pool)
+        self.model = WhisperModel(size, device=device, compute_type=compute_type, cpu_threads=0)
+
+    def transcribe(self, audio, language: str | None = None, **options) -> dict:
+        options.pop("fp16", None)
+        options.pop("verbose", None)
+        segments, info = self.model.transcribe(audio, language=language, **options)
+        result_segments = []
+        for segment in segments:
+            entry = {
+                "id": segment.id, "seek": segment.seek, "start": segment.start, "end": segment.end,
+                "text": segment.text, "tokens": list(segment.tokens), "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob, "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob,
+            }
+            if segment.words is not None:
+                entry["words"] = [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in segment.words
+                ]
+            result_segments.append(entry)
+        return {
+            "text": "".join(segment["text"] for segment in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+
+
+_LOADERS = {
+    "whisper": _load_whisper,
+    "whisper-int8": _load_whisper_int8,
+    "faster-whisper": FasterWhisperModel,
+}
+
+
+def load(backend: str, size: str, device: str, dtype: str = "float32"):
+    """Charge le modèle `size` avec le moteur demandé ; le modèle porte son nom de moteur (asr_backend)."""
+    if backend not in _LOADERS:
+        raise ValueError(f"Moteur de transcription inconnu: {backend} (choix: {', '.join(BACKENDS)})")
+    model = _LOADERS[backend](size, device, dtype)
+    model.asr_backend = backend
+    return model
+
+
+def backend_of(model) -> str:
+    return getattr(model, "asr_backend", "whisper")
+
+
+def load_audio(audio_path: str):
+    """
+    Audio float32 mono 16 kHz d'un segment : vue sur l'intermédiaire PCM du découpage s'il existe
+    (pcm_store, sans décodage), sinon décodage avec ffmpeg à l'identique de whisper.load_audio
+    (mêmes échantillons, donc mêmes clés de cache) mais sans importer torch.
+    """
+    import subprocess
+
+    import numpy as np
+
+    import pcm_store
+
+    audio = pcm_store.open_segment(audio_path)
+    if audio is not None:
+        return audio
+    if audio_path.endswith(".pcm"):
+        # Segment sans MP3 (--no-mp3) : il n'existe que dans l'intermédiaire PCM
+        raise FileNotFoundError(f"Intermédiaire PCM introuvable pour {audio_path} "
+                                f"({pcm_store.PCM_NAME} et segments_manifest.json doivent être dans le même dossier)")
+
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path, "-f", "s16le", "-ac", "1",
+           "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def _words(text: str) -> list[str]:
+    text = unicodedata.normalize("NFC", text.lower())
+    return re.findall(r"[\w']+", text.replace("’", "'"))
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER = (substitutions + suppressions + insertions) / mots de référence, sans casse ni ponctuation."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_samples(samples_dir: str) -> list[tuple[str, str]]:
+    """Jeu d'échantillons fixe : chaque fichier audio a sa transcription de référence <nom>.txt à côté."""
+    samples = []
+    for name in sorted(os.listdir(samples_dir)):
+        stem, ext = os.path.splitext(name)
+        reference_path = os.path.join(samples_dir, f"{stem}.txt")
+        if ext.lower() in {".wav", ".mp3", ".flac", ".ogg", ".m4a"} and os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                samples.append((os.path.join(samples_dir, name), f.read()))
+    return samples
+
+
+def benchmark_backends(samples_dir: str, backends=BACKENDS, model_size: str = "base", language: str = "fr") -> dict:
+    """
+    Facteur temps réel (temps de transcription / durée audio) et WER de chaque moteur sur le
+    jeu d'échantillons. Le chargement du modèle est mesuré à part, l'audio est décodé une seule fois.
+    """
+    import whisper_models
+
+    samples = [(path, reference, load_audio(path)) for path, reference in load_samples(samples_dir)]
+    if not samples:
+        raise ValueError(f"Aucun couple audio + .txt de référence dans {samples_dir}")
+    audio_sec = sum(len(audio) for _, _, audio in samples) / SAMPLE_RATE
+    print(f"{len(samples)} échantillons, {audio_sec:.0f} s d'audio, modèle {model_size}\n")
+
+    results = {}
+    for backend in backends:
+        start = time.perf_counter()
+        try:
+            model = whisper_models.get_model(model_size, device="cpu", backend=backend)
+        except ImportError as e:
+            print(f"{backend:>15} : indisponible ({e})")
+            continue
+        load_sec = time.perf_counter() - start
+
+        errors = 0.0
+        words = 0
+        start = time.perf_counter()
+        for _, reference, audio in samples:
+            text = model.transcribe(audio, language=language)["text"]
+            n = len(_words(reference))
+            errors += word_error_rate(reference, text) * n
+            words += n
+        elapsed = time.perf_counter() - start
+        results[backend] = {"load_sec": load_sec, "transcribe_sec": elapsed, "rtf": elapsed / audio_sec,
+                            "wer": errors / max(words, 1)}
+        print(f"{backend:>15} : RTF {results[backend]['rtf']:.3f}  WER {results[backend]['wer']:.1%}"
+              f"  (chargement {load_sec:.1f} s)")
+        whisper_models.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les moteurs de transcription (facteur temps réel et WER).")
+    parser.add_argument("samples", help="Dossier d'échantillons : fichiers audio + transcription de référence <nom>.txt")
+    parser.add_argument("-m", "--model", default="base", help="Taille du modèle Whisper (défaut: base)")
+    parser.add_argument("-b", "--backends", nargs="+", default=BACKENDS, choices=BACKENDS,
+                        help="Moteurs à comparer (défaut: tous)")
+    args = parser.parse_args()
+    benchmark_backends(args.samples, args.backends, args.model)
+
+
+if __name__ == "__main__":
+    main()
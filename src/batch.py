@@ -0,0 +1,234 @@
+"""
+Traitement par lots, sans interface graphique, d'une liste de fichiers audio/vidéo.
+Les modèles restent chargés d'un fichier à l'autre ; le découpage des fichiers suivants
+et les résumés des fichiers précédents tournent en parallèle de la transcription.
+Chaque entrée a son propre dossier de sortie (segments, transcriptions, résumés, manifeste).
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+MEDIA_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac", ".m4a", ".mp4", ".avi", ".mkv", ".mov"}
+
+
+def collect_inputs(patterns: list[str], list_file: str | None = None) -> list[str]:
+    """Développe fichiers, dossiers (récursivement) et motifs glob en une liste triée et sans doublons."""
+    if list_file:
+        with open(list_file, "r", encoding="utf-8") as f:
+            patterns = patterns + [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    inputs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            candidates = glob.glob(pattern, recursive=True) or [pattern]
+        inputs.extend(
+            path for path in candidates
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in MEDIA_EXTENSIONS
+        )
+    return sorted(dict.fromkeys(os.path.abspath(path) for path in inputs))
+
+
+def resolve_api_key() -> str | None:
+    """Clé OpenAI depuis l'environnement ou config.json, sans jamais la demander."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if api_key:
+        return api_key
+    if os.path.exists("config.json"):
+        with open("config.json", "r") as f:
+            return json.load(f).get("OPENAI_API_KEY") or None
+    return None
+
+
+def _split_one(input_path: str, ws: dict, segment_duration_min: int, manifest: dict, pcm: bool = False,
+               export_mp3: bool = True) -> list[str]:
+    import job_manifest
+    import metrics
+    from Split import iter_split_audio
+
+    segments_paths = job_manifest.completed_segments(manifest)
+    if segments_paths is not None:
+        print(f"⏩ {input_path}: découpage déjà effectué")
+        return segments_paths
+    with metrics.labels(job=os.path.basename(ws["base"])):
+        return list(job_manifest.record_segments(
+            manifest, iter_split_audio(input_path, segment_duration_min, output_directory=ws["segments"],
+                                       scratch_directory=ws["scratch"], pcm=pcm, export_mp3=export_mp3)
+        ))
+
+
+def _summarize_one(transcriptions: list[str], ws: dict, api_key: str, manifest: dict, dedupe: bool = True) -> None:
+    import job_manifest
+    import metrics
+    from process_gloabl import summarize_transcriptions
+
+    if job_manifest.summary_done(manifest):
+        return
+    with metrics.labels(job=os.path.basename(ws["base"])):
+        summarize_transcriptions(transcriptions, output_directory=ws["resumes"], api_key=api_key, dedupe=dedupe)
+    job_manifest.record_summary(manifest, os.path.join(ws["resumes"], "resume_global.txt"))
+
+
+def run_batch(inputs: list[str], output_root: str = "sorties", segment_duration_min: int = 30,
+              model_size: str = "base", processes: int = 1, threads_per_process: int | None = None,
+              split_workers: int = 2, summary_workers: int = 4, summarize: bool = True,
+              backend: str | None = None, batch_size: int = 1, pcm: bool = False, export_mp3: bool = True,
+              dedupe: bool = True) -> dict:
+    """
+    Traite tous les fichiers : découpage (split_workers fichiers en avance), transcription
+    avec un modèle chargé une seule fois, résumés en arrière-plan. Un échec sur un fichier
+    n'interrompt pas les autres ; une relance reprend chaque fichier là où il s'était arrêté.
+    Retourne le statut de chaque entrée.
+    """
+    import job_manifest
+    import metrics
+    import whisper_models
+    from process_gloabl import transcribe_segments
+    from workspace import WorkspaceBusy, job_id_for, job_workspace
+
+    api_key = resolve_api_key() if summarize else None
+    if summarize and not api_key:
+        raise RuntimeError("Clé OpenAI introuvable (variable OPENAI_API_KEY ou config.json) ; utilisez --no-summary")
+
+    # Modèles chargés une seule fois pour tout le lot
+    executor = None
+    if processes > 1:
+        from transcribe_pool import make_executor
+
+        executor = make_executor(model_size, processes, threads_per_process, backend)
+    else:
+        whisper_models.preload([model_size], backend=backend)
+
+    status = {}
+    start = time.perf_counter()
+    window = deque()
+    try:
+        with ThreadPoolExecutor(split_workers) as split_pool, ThreadPoolExecutor(summary_workers) as summary_pool:
+            pending = iter(inputs)
+
+            def submit_next():
+                # Démarre le découpage du prochain fichier : au plus split_workers fichiers découpés
+                # d'avance sur la transcription (disque et verrous d'espace de travail bornés)
+                for input_path in pending:
+                    # Dossier au nom du fichier suffixé d'une empreinte de son chemin : deux fichiers de même
+                    # nom (dans ce lot ou un lot précédent) n'écrivent jamais dans le même dossier
+                    workspace = ExitStack()
+                    try:
+                        ws = workspace.enter_context(job_workspace(job_id_for(input_path), root=output_root))
+                    except WorkspaceBusy as e:
+                        status[input_path] = f"erreur: {e}"
+                        print(f"\n❌ {input_path}: {e}")
+                        continue
+                    params = job_manifest.pipeline_params(segment_duration_min, model_size, backend, batch_size,
+                                                          pcm, export_mp3, dedupe)
+                    manifest = job_manifest.load(input_path, params, path=ws["manifest"])
+                    future = split_pool.submit(_split_one, input_path, ws, segment_duration_min, manifest, pcm,
+                                               export_mp3)
+                    window.append((input_path, ws, workspace, manifest, future))
+                    return
+
+            for _ in range(max(1, split_workers)):
+                submit_next()
+
+            summaries = []
+            while window:
+                input_path, ws, workspace, manifest, split_future = window.popleft()
+                try:
+                    segments_paths = split_future.result()
+                    with metrics.labels(job=os.path.basename(ws["base"])):
+                        transcriptions = transcribe_segments(
+                            segments_paths, model_size, manifest=manifest,
+                            output_directory=ws["transcriptions"], executor=executor, backend=backend,
+                            batch_size=batch_size,
+                        )
+                    status[input_path] = "transcrit"
+                    if summarize:
+                        # L'espace de travail (verrou, scratch) est libéré dès que le résumé est écrit
+                        summary_future = summary_pool.submit(_summarize_one, transcriptions, ws, api_key, manifest,
+                                                             dedupe)
+                        summary_future.add_done_callback(lambda _, workspace=workspace: workspace.close())
+                        summaries.append((input_path, summary_future))
+                    else:
+                        workspace.close()
+                except Exception as e:
+                    workspace.close()
+                    status[input_path] = f"erreur: {e}"
+                    print(f"\n❌ {input_path}: {e}")
+                except BaseException:
+                    workspace.close()
+                    raise
+                submit_next()
+
+            for input_path, summary_future in summaries:
+                try:
+                    summary_future.result()
+                    status[input_path] = "terminé"
+                except Exception as e:
+                    status[input_path] = f"erreur (résumé): {e}"
+                    print(f"\n❌ {input_path}: {e}")
+    finally:
+        # Interruption : libère les espaces des fichiers découpés d'avance (après l'arrêt des pools)
+        for _, _, workspace, _, _ in window:
+            workspace.close()
+
+    if executor is not None:
+        executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    done = sum(1 for s in status.values() if not s.startswith("erreur"))
+    print(f"\n✅ {done}/{len(inputs)} fichiers traités en {elapsed:.0f} s → {os.path.abspath(output_root)}")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traitement par lots (découpage, transcription, résumé) sans interface.")
+    parser.add_argument("inputs", nargs="*", help="Fichiers, dossiers ou motifs glob (ex: 'enregistrements/**/*.mp4')")
+    parser.add_argument("-l", "--list", help="Fichier texte contenant un chemin ou motif par ligne")
+    parser.add_argument("-o", "--output", default="sorties", help="Dossier racine des sorties (défaut: sorties)")
+    parser.add_argument("-d", "--duration", type=int, default=30, help="Durée des segments en minutes (défaut: 30)")
+    parser.add_argument("-m", "--model", default="base", help="Taille du modèle Whisper (défaut: base)")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="Processus de transcription (défaut: 1)")
+    parser.add_argument("-t", "--threads", type=int, help="Threads de calcul par processus de transcription")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8, faster-whisper ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Fenêtres de 30 s décodées par lot avec un seul processus (défaut: 1)")
+    parser.add_argument("--pcm", action="store_true",
+                        help="Intermédiaire PCM 16 kHz lu par la transcription sans redécodage")
+    parser.add_argument("--no-mp3", action="store_true", help="Avec --pcm, ne pas exporter les segments en MP3")
+    parser.add_argument("--split-workers", type=int, default=2, help="Fichiers découpés en parallèle (défaut: 2)")
+    parser.add_argument("--summary-workers", type=int, default=4, help="Résumés en parallèle (défaut: 4)")
+    parser.add_argument("--no-summary", action="store_true", help="Ne pas générer de résumé")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="Ne pas retirer les répétitions et recouvrements avant le résumé")
+    parser.add_argument("--metrics", metavar="FICHIER", help="Mesures par étape et par segment en JSON lines")
+    parser.add_argument("--prometheus", metavar="FICHIER", help="Mesures agrégées au format texte Prometheus")
+    parser.add_argument("--profile", choices=["cprofile", "py-spy"], help="Profile chaque étape (dossier profiles/)")
+    args = parser.parse_args()
+
+    import metrics
+
+    metrics.configure(jsonl=args.metrics, prometheus=args.prometheus, profile=args.profile)
+
+    inputs = collect_inputs(args.inputs, args.list)
+    if not inputs:
+        parser.error("aucun fichier audio/vidéo trouvé")
+    print(f"=== TRAITEMENT PAR LOTS : {len(inputs)} fichiers ===")
+
+    status = run_batch(inputs, args.output, args.duration, args.model, args.processes, args.threads,
+                       args.split_workers, args.summary_workers, summarize=not args.no_summary, backend=args.backend,
+                       batch_size=args.batch_size, pcm=args.pcm or args.no_mp3, export_mp3=not args.no_mp3,
+                       dedupe=not args.no_dedupe)
+    if any(s.startswith("erreur") for s in status.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
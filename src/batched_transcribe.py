@@ -0,0 +1,226 @@
+"""
+Transcription par lots de fenêtres de 30 s.
+Whisper travaille sur des fenêtres de 30 s mais model.transcribe les traite une à une.
+Ici l'audio des segments est découpé en fenêtres de 30 s, les log-mel de toutes les fenêtres
+d'un lot sont calculés en une fois, puis l'encodeur et le décodeur tournent sur le lot entier.
+Les résultats sont réassemblés par segment, avec des horodatages relatifs au segment.
+
+Les fenêtres sont fixes (pas de recalage sur le dernier horodatage comme model.transcribe) :
+un mot à cheval sur deux fenêtres peut être coupé. Réservé aux moteurs torch (whisper, whisper-int8).
+"""
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+WINDOW_SEC = 30
+N_SAMPLES = WINDOW_SEC * SAMPLE_RATE
+N_FFT = 400
+HOP_LENGTH = 160
+
+
+def split_windows(audio: np.ndarray) -> np.ndarray:
+    """Fenêtres de 30 s (n, N_SAMPLES) ; la dernière est complétée par des zéros."""
+    n_windows = -(-len(audio) // N_SAMPLES)
+    padded = np.zeros(n_windows * N_SAMPLES, dtype=np.float32)
+    padded[:len(audio)] = audio
+    return padded.reshape(n_windows, N_SAMPLES)
+
+
+def log_mel_batch(windows: np.ndarray, n_mels: int, device):
+    """
+    Log-mel de toutes les fenêtres en un seul calcul (STFT par lot).
+    Identique à whisper.log_mel_spectrogram fenêtre par fenêtre, y compris le plancher
+    de dynamique calculé sur chaque fenêtre.
+    """
+    import torch
+    from whisper.audio import mel_filters
+
+    audio = torch.from_numpy(windows).to(device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=torch.hann_window(N_FFT, device=device),
+                      return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel = mel_filters(device, n_mels) @ magnitudes
+    log_spec = torch.clamp(mel, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+def _segments_from_tokens(tokens: list[int], tokenizer, offset: float, duration: float) -> list[dict]:
+    """Découpe les tokens d'une fenêtre en segments d'après les tokens d'horodatage (pas de 0,02 s)."""
+    segments = []
+    start = None
+    last_end = 0.0
+    text_tokens = []
+
+    def close(end):
+        text = tokenizer.decode(text_tokens)
+        if text.strip():
+            begin = start if start is not None else last_end
+            segments.append({"start": round(offset + begin, 2), "end": round(offset + min(end, duration), 2),
+                             "text": text, "tokens": list(text_tokens)})
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            t = (token - tokenizer.timestamp_begin) * 0.02
+            if start is not None and text_tokens:
+                close(t)
+                text_tokens = []
+                start = None
+                last_end = t
+            else:
+                start = t
+        else:
+            text_tokens.append(token)
+    if text_tokens:
+        close(duration)
+    return segments
+
+
+def _decode_batch(model, batch: list[tuple], language: str) -> None:
+    """Transcrit un lot de fenêtres [(entrée, index de fenêtre, échantillons)] et range les résultats."""
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    device = next(model.parameters()).device
+    fp16 = next(model.parameters()).dtype == torch.float16
+    mel = log_mel_batch(np.stack([samples for _, _, samples in batch]), model.dims.n_mels, device)
+    if fp16:
+        mel = mel.half()
+    options = whisper.DecodingOptions(task="transcribe", language=language, fp16=fp16)
+    with torch.inference_mode():
+        results = whisper.decode(model, mel, options)
+
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages, language=language,
+                              task="transcribe")
+    for (entry, w, _), result in zip(batch, results):
+        # Même règle que model.transcribe pour les fenêtres sans parole
+        if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+            entry["windows"][w] = []
+            continue
+        offset = w * WINDOW_SEC
+        duration = min(WINDOW_SEC, entry["duration"] - offset)
+        segments = _segments_from_tokens(result.tokens, tokenizer, offset, duration)
+        for segment in segments:
+            segment.update(temperature=result.temperature, avg_logprob=result.avg_logprob,
+                           compression_ratio=result.compression_ratio, no_speech_prob=result.no_speech_prob)
+        entry["windows"][w] = segments
+
+
+def _assemble(entry: dict, language: str) -> dict:
+    segments = [segment for window in entry["windows"] for segment in window]
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+        segment["seek"] = int(segment["start"] // WINDOW_SEC) * WINDOW_SEC * SAMPLE_RATE // HOP_LENGTH
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": language}
+
+
+def iter_transcribe_batched(model, audio_paths, batch_size: int = 8, language: str = "fr",
+                            use_cache: bool = False, model_size: str = "base"):
+    """
+    Transcrit les segments par lots de batch_size fenêtres de 30 s, toutes origines confondues,
+    et produit les résultats {"text", "segments", "language"} dans l'ordre des segments.
+    audio_paths peut être alimenté au fil de l'eau : un segment est rendu dès que ses fenêtres sont décodées.
+    Avec use_cache, les segments déjà transcrits (même audio, modèle, mode par lots) sont relus du cache.
+    """
+    import transcription_cache
+    from asr_backends import backend_of, load_audio
+
+    if backend_of(model) == "faster-whisper":
+        # CTranslate2 a sa propre interface de lots : on garde la transcription fichier par fichier
+        for audio_path in audio_paths:
+            yield transcription_cache.transcribe_cached(model, audio_path, model_size, language) if use_cache \
+                else model.transcribe(load_audio(audio_path), language=language)
+        return
+
+    pending = deque()
+    queue = []
+
+    def ready():
+        while pending and (pending[0]["result"] is not None or None not in pending[0]["windows"]):
+            entry = pending.popleft()
+            if entry["result"] is None:
+                entry["result"] = _assemble(entry, language)
+                if entry["key"] is not None:
+                    transcription_cache.put(entry["key"], entry["result"])
+            yield entry["result"]
+
+    for audio_path in audio_paths:
+        audio = load_audio(audio_path)
+        entry = {"key": None, "result": None, "windows": [], "duration": len(audio) / SAMPLE_RATE}
+        if use_cache:
+            entry["key"] = transcription_cache.cache_key(audio, transcription_cache.model_id(model, model_size),
+                                                         language, {"batched": True})
+            entry["result"] = transcription_cache.get(entry["key"])
+        if entry["result"] is None:
+            windows = split_windows(audio)
+            entry["windows"] = [None] * len(windows)
+            queue.extend((entry, w, samples) for w, samples in enumerate(windows))
+        pending.append(entry)
+
+        while len(queue) >= batch_size:
+            _decode_batch(model, queue[:batch_size], language)
+            del queue[:batch_size]
+        yield from ready()
+
+    if queue:
+        _decode_batch(model, queue, language)
+    yield from ready()
+
+
+def benchmark_batch_sizes(audio_paths, model_size: str = "base", batch_sizes=(1, 2, 4, 8, 16),
+                          backend: str | None = None, language: str = "fr") -> dict:
+    """Débit (secondes d'audio transcrites par seconde et fenêtres/s) selon la taille de lot."""
+    import whisper_models
+    from asr_backends import load_audio
+
+    model = whisper_models.get_model(model_size, backend=backend)
+    lengths = [len(load_audio(path)) for path in audio_paths]
+    audio_sec = sum(lengths) / SAMPLE_RATE
+    n_windows = sum(-(-length // N_SAMPLES) for length in lengths)
+    print(f"{len(audio_paths)} segments, {audio_sec:.0f} s d'audio, {n_windows} fenêtres de 30 s\n")
+
+    results = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for _ in iter_transcribe_batched(model, audio_paths, batch_size, language):
+            pass
+        elapsed = time.perf_counter() - start
+        results[batch_size] = {"seconds": elapsed, "audio_sec_per_sec": audio_sec / elapsed,
+                               "windows_per_sec": n_windows / elapsed}
+        print(f"lot de {batch_size:>3} : {elapsed:7.1f} s  {audio_sec / elapsed:6.1f} s audio/s"
+              f"  {n_windows / elapsed:5.2f} fenêtres/s")
+
+    best = max(results, key=lambda b: results[b]["audio_sec_per_sec"])
+    print(f"\n🏆 Meilleure taille de lot : {best}")
+    return {"timings": results, "best": best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription par lots de fenêtres de 30 s.")
+    parser.add_argument("segments", nargs="+", help="Fichiers audio à transcrire")
+    parser.add_argument("-m", "--model", default="base", help="Taille du modèle Whisper (défaut: base)")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8 ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Fenêtres par lot (défaut: 8)")
+    parser.add_argument("--bench", type=int, nargs="*", metavar="TAILLE",
+                        help="Mesure le débit pour chaque taille de lot (défaut: 1 2 4 8 16)")
+    args = parser.parse_args()
+
+    if args.bench is not None:
+        benchmark_batch_sizes(args.segments, args.model, args.bench or (1, 2, 4, 8, 16), args.backend)
+        return
+
+    import whisper_models
+
+    model = whisper_models.get_model(args.model, backend=args.backend)
+    for path, result in zip(args.segments, iter_transcribe_batched(model, args.segments, args.batch_size)):
+        print(f"=== {path}\n{result['text']}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark du temps d'import des points d'entrée (python -X importtime).
+Échoue (code de sortie 1) si un point d'entrée dépasse son budget ou importe
+un module lourd au démarrage, pour détecter les régressions.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Budgets de temps d'import cumulé, en secondes
+BUDGETS = {
+    "process_gloabl": 0.5,
+    "test_summary": 0.5,
+    "resume": 0.5,
+}
+
+# Modules qui ne doivent être importés qu'à la demande
+HEAVY_MODULES = {
+    "torch", "whisper", "transformers", "openai", "anthropic", "mistralai",
+    "vertexai", "google.cloud.aiplatform", "tkinter", "librosa", "moviepy",
+}
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """Importe `module` dans un processus neuf ; retourne (temps cumulé en s, modules importés)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr}")
+
+    cumulative_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1e6, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie le temps d'import des points d'entrée.")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="Modules à mesurer")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        elapsed, imported = measure_import(module)
+        heavy = sorted(m for m in imported if m in HEAVY_MODULES)
+        budget = BUDGETS.get(module)
+        ok = not heavy and (budget is None or elapsed <= budget)
+        failed |= not ok
+        status = "✅" if ok else "❌"
+        print(f"{status} {module}: {elapsed * 1000:.0f} ms" + (f" (budget {budget * 1000:.0f} ms)" if budget else ""))
+        if heavy:
+            print(f"   modules lourds importés au démarrage: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Benchmark de bout en bout du pipeline, hors ligne et reproductible.
+Des médias synthétiques (audio WAV ou vidéo MP4) de durée configurable sont générés, puis
+chaque cas est chronométré dans un processus neuf (pic de mémoire propre au cas, un crash
+ou un OOM est rapporté sans interrompre les autres) :
+- split : Split.split_audio
+- transcribe : transcription avec le modèle tiny
+- concatenate : Concatene.concatenate sur des transcriptions horodatées synthétiques
+- summary : résumé map-reduce contre un faux serveur compatible OpenAI local
+Les résultats sont écrits dans un rapport JSON (un fichier par commit) comparable avec --compare.
+Le signal synthétique ne contient pas de parole : le cas transcribe mesure le coût du modèle,
+pas la qualité de la transcription (voir asr_backends pour le WER).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+
+CASES = ["split", "transcribe", "concatenate", "summary"]
+WORDS = ("le la les un une des et est dans pour que qui réunion projet budget équipe calendrier décision "
+         "client produit livraison risque priorité semaine prochaine point suivant").split()
+
+
+def synthetic_text(n_words: int, seed: int = 0) -> str:
+    """Texte pseudo-français déterministe, découpé en phrases."""
+    import random
+
+    rng = random.Random(seed)
+    sentences = []
+    while n_words > 0:
+        length = min(n_words, rng.randint(8, 20))
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+        n_words -= length
+    return " ".join(sentences)
+
+
+def count_words(text: str) -> int:
+    """
+    Compteur de tokens local pour le cas summary (un mot = un token) : le compteur tiktoken par
+    défaut de chunking télécharge son encodage au premier appel, ce qui casserait le mode hors ligne.
+    """
+    return len(text.split())
+
+
+def make_media(path: str, duration_sec: float) -> str:
+    """Audio synthétique (WAV 16 kHz) ou, pour un .mp4, vidéo noire avec cette piste audio (ffmpeg)."""
+    from Split import _write_synthetic_audio
+
+    if not path.endswith(".mp4"):
+        _write_synthetic_audio(path, duration_sec)
+        return path
+    wav_path = os.path.splitext(path)[0] + ".wav"
+    _write_synthetic_audio(wav_path, duration_sec)
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "color=c=black:s=320x240:r=5", "-i", wav_path,
+         "-shortest", "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", path],
+        check=True,
+    )
+    os.remove(wav_path)
+    return path
+
+
+def make_transcriptions(directory: str, segments: int, records_per_segment: int) -> str:
+    """Transcriptions horodatées synthétiques (transcription_XX.jsonl + .txt), comme transcribe_segments."""
+    import transcript_format
+
+    os.makedirs(directory, exist_ok=True)
+    for i in range(1, segments + 1):
+        records = [
+            {"segment": i, "start": (i - 1) * 1800 + 5.0 * n, "end": (i - 1) * 1800 + 5.0 * n + 4.5,
+             "text": synthetic_text(12, seed=i * 100000 + n)}
+            for n in range(records_per_segment)
+        ]
+        transcript_format.write_jsonl(os.path.join(directory, f"transcription_{i:02d}.jsonl"), records)
+        with open(os.path.join(directory, f"transcription_{i:02d}.txt"), "w", encoding="utf-8") as f:
+            f.write(" ".join(record["text"] for record in records))
+    return directory
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Répond à /chat/completions comme l'API OpenAI, avec un résumé tronqué et un usage estimé."""
+
+    latency_sec = 0.0
+    log = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        start = time.perf_counter()
+        time.sleep(self.latency_sec)
+        if self.log is not None:
+            self.log.append((body, start, time.perf_counter()))
+        prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+        words = prompt.split()
+        content = " ".join(words[-60:])
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(words), "completion_tokens": min(60, len(words)),
+                      "total_tokens": len(words) + min(60, len(words))},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def stub_llm_server(latency_sec: float = 0.05, log: list | None = None):
+    """
+    Faux serveur compatible OpenAI sur 127.0.0.1 ; retourne son base_url.
+    Avec log, chaque requête y est ajoutée : (corps JSON, début, fin) en time.perf_counter().
+    """
+    handler = type("StubHandler", (_StubHandler,), {"latency_sec": latency_sec, "log": log})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _run_case(case: str, params: dict, workdir: str, repeat: int) -> dict:
+    """Exécuté dans un processus neuf : prépare les entrées (non chronométré) puis mesure `repeat` fois."""
+    import contextlib
+    import io
+
+    import metrics
+
+    runs = []
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    def measure(func, *args, **kwargs):
+        with quiet, metrics.stage(case) as info:
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            info["exact_seconds"] = time.perf_counter() - start
+        runs.append(info)
+
+    if case == "split":
+        from Split import split_audio
+
+        for n in range(repeat):
+            measure(split_audio, params["media"], params["segment_min"], os.path.join(workdir, f"split_{n}"),
+                    workers=params["workers"])
+        units = params["length_sec"]
+    elif case == "transcribe":
+        import whisper_models
+        from process_gloabl import transcribe_segments
+        from Split import split_audio
+
+        with quiet:
+            segments = split_audio(params["media"], params["segment_min"], os.path.join(workdir, "segments"))
+            whisper_models.preload([params["model"]])
+        for n in range(repeat):
+            measure(transcribe_segments, segments, params["model"], use_cache=False,
+                    output_directory=os.path.join(workdir, f"transcriptions_{n}"))
+        units = params["length_sec"]
+    elif case == "concatenate":
+        from Concatene import concatenate
+
+        source = make_transcriptions(os.path.join(workdir, "transcriptions"), params["segments"],
+                                     params["records_per_segment"])
+        for n in range(repeat):
+            measure(concatenate, source, os.path.join(workdir, f"verbatim_{n}.{params['format']}"), params["format"])
+        units = params["segments"] * params["records_per_segment"]
+    elif case == "summary":
+        from chunking import chunk_text
+        from summarizer import summarize_map_reduce
+
+        chunks = chunk_text(synthetic_text(params["words"]), max_tokens=8000, count_tokens=count_words)
+        with stub_llm_server(params["llm_latency_sec"]) as base_url:
+            for _ in range(repeat):
+                measure(summarize_map_reduce, chunks, "stub", base_url=base_url, model="stub",
+                        concurrency=params["concurrency"], cache=False)
+        units = params["words"]
+    else:
+        raise ValueError(f"Cas inconnu: {case} (choix: {', '.join(CASES)})")
+
+    seconds = [run["exact_seconds"] for run in runs]
+    return {
+        "seconds": seconds,
+        "min": min(seconds),
+        "mean": statistics.mean(seconds),
+        "stdev": statistics.stdev(seconds) if len(seconds) > 1 else 0.0,
+        # Secondes d'audio, lignes de transcription ou mots traités par seconde
+        "throughput": units / min(seconds) if min(seconds) else None,
+        "peak_rss_bytes": max((run["peak_rss_bytes"] or 0 for run in runs), default=0) or None,
+        "peak_rss_children_bytes": max((run["peak_rss_children_bytes"] or 0 for run in runs), default=0) or None,
+        "bytes_read": runs[0]["bytes_read"],
+        "bytes_written": runs[0]["bytes_written"],
+    }
+
+
+def _isolated(case: str, params: dict, workdir: str, repeat: int) -> dict:
+    """Lance un cas dans un processus neuf ; un import manquant ou un crash est rapporté comme statut."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        try:
+            return {"status": "ok", **executor.submit(_run_case, case, params, workdir, repeat).result()}
+        except ImportError as e:
+            return {"status": "skipped", "reason": str(e)}
+        except BrokenProcessPool:
+            return {"status": "crashed", "reason": "processus interrompu (mémoire insuffisante ?)"}
+        except Exception as e:
+            return {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases=CASES, lengths=(60, 600), video: bool = False, repeat: int = 3, model: str = "tiny",
+              segment_min: int = 5, workers: int = 1, summary_words=(5000, 50000), concurrency: int = 8,
+              llm_latency_sec: float = 0.05) -> dict:
+    """Exécute les cas demandés pour chaque taille d'entrée et retourne le rapport."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline-") as tmp_dir:
+        plan = []
+        for length in lengths:
+            for case in ("split", "transcribe"):
+                if case in cases:
+                    plan.append((case, {"length_sec": length, "video": video, "segment_min": segment_min,
+                                        "workers": workers, "model": model}))
+            if "concatenate" in cases:
+                # ~ une phrase toutes les 5 s
+                segments = max(1, -(-length // (segment_min * 60)))
+                plan.append(("concatenate", {"length_sec": length, "segments": segments,
+                                             "records_per_segment": max(1, int(length / segments / 5)),
+                                             "format": "srt"}))
+        if "summary" in cases:
+            for words in summary_words:
+                plan.append(("summary", {"words": words, "concurrency": concurrency,
+                                         "llm_latency_sec": llm_latency_sec}))
+
+        media = {}
+        for case, params in plan:
+            print(f"▶ {case} {json.dumps(params)}", flush=True)
+            try:
+                if case in ("split", "transcribe"):
+                    # Un même média synthétique par durée, généré hors chronométrage
+                    length = params["length_sec"]
+                    if length not in media:
+                        path = os.path.join(tmp_dir, f"synthetic_{length}s.{'mp4' if video else 'wav'}")
+                        media[length] = make_media(path, length)
+                    params = {**params, "media": media[length]}
+            except ImportError as e:
+                result = {"status": "skipped", "reason": str(e)}
+            except (OSError, subprocess.CalledProcessError) as e:
+                result = {"status": "error", "reason": f"génération du média impossible: {e}"}
+            else:
+                result = _isolated(case, params, tempfile.mkdtemp(dir=tmp_dir, prefix=f"{case}-"), repeat)
+            if result["status"] == "ok":
+                rss = f"{result['peak_rss_bytes'] / 1024 ** 2:.0f} Mo" if result["peak_rss_bytes"] else "indisponible"
+                print(f"   {result['min']:.3f} s (moyenne {result['mean']:.3f} s), pic RSS {rss}")
+            else:
+                print(f"   {result['status']}: {result['reason']}")
+            results.append({"case": case, "params": {k: v for k, v in params.items() if k != "media"}, **result})
+
+    return {
+        "commit": _git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpu_count": os.cpu_count()},
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(previous: dict, current: dict, threshold: float = 0.1) -> None:
+    """Affiche l'évolution du temps minimal et du pic RSS de chaque cas présent dans les deux rapports."""
+    def index(report):
+        return {(r["case"], json.dumps(r["params"], sort_keys=True)): r for r in report["results"]
+                if r["status"] == "ok"}
+
+    before, after = index(previous), index(current)
+    print(f"\n=== {previous.get('commit')} → {current.get('commit')} ===")
+    for key in after:
+        if key not in before:
+            continue
+        ratio = after[key]["min"] / before[key]["min"] if before[key]["min"] else float("inf")
+        rss = f"x{after[key]['peak_rss_bytes'] / before[key]['peak_rss_bytes']:.2f}" \
+            if after[key]["peak_rss_bytes"] and before[key]["peak_rss_bytes"] else "?"
+        flag = "❌" if ratio > 1 + threshold else ("✅" if ratio < 1 - threshold else "  ")
+        print(f"{flag} {key[0]:<12} {key[1]:<90.90} temps x{ratio:.2f}  RSS {rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne du pipeline sur des médias synthétiques.")
+    parser.add_argument("cases", nargs="*", default=CASES, help=f"Cas à exécuter (défaut: {' '.join(CASES)})")
+    parser.add_argument("-l", "--lengths", type=int, nargs="+", default=[60, 600],
+                        help="Durées des médias synthétiques en secondes (défaut: 60 600)")
+    parser.add_argument("--video", action="store_true", help="Médias synthétiques en MP4 au lieu de WAV")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Répétitions par cas (défaut: 3)")
+    parser.add_argument("-m", "--model", default="tiny", help="Modèle Whisper du cas transcribe (défaut: tiny)")
+    parser.add_argument("-d", "--duration", type=int, default=5, help="Durée des segments en minutes (défaut: 5)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Processus d'encodage du cas split (défaut: 1)")
+    parser.add_argument("--words", type=int, nargs="+", default=[5000, 50000],
+                        help="Tailles du texte à résumer en mots (défaut: 5000 50000)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latence simulée du faux LLM (défaut: 0.05 s)")
+    parser.add_argument("-o", "--output", help="Rapport JSON (défaut: benchmarks/<commit>.json)")
+    parser.add_argument("--compare", metavar="RAPPORT", help="Rapport précédent à comparer")
+    args = parser.parse_args()
+
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"cas inconnu(s): {', '.join(sorted(unknown))} (choix: {', '.join(CASES)})")
+
+    report = run_suite(args.cases, args.lengths, args.video, args.repeat, args.model, args.duration, args.workers,
+                       args.words, llm_latency_sec=args.llm_latency)
+    output = args.output or os.path.join("benchmarks", f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 Rapport écrit dans {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+    if any(r["status"] in ("crashed", "error") for r in report["results"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
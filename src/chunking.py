@@ -0,0 +1,102 @@
+"""
+Découpage des transcriptions en morceaux mesurés en tokens.
+Les phrases sont regroupées jusqu'au budget de tokens du modèle (avec recouvrement
+optionnel), ce qui évite à la fois les entrées tronquées et le contexte gaspillé.
+Fonctionne aussi en flux sur une transcription qui arrive par morceaux.
+"""
+
+import re
+from functools import lru_cache
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+@lru_cache(maxsize=None)
+def _tiktoken_encoding(model: str):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def token_counter(model: str = "gpt-5"):
+    """Fonction de comptage de tokens basée sur le tokenizer tiktoken du modèle."""
+    encoding = _tiktoken_encoding(model)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count_tokens):
+    """
+    Découpe sur les mots une phrase qui dépasse à elle seule le budget.
+    Chaque mot n'est compté qu'une fois (avec son espace de tête, comme dans le texte joint) et le
+    total du morceau est tenu à jour : les tokenizers BPE découpent d'abord sur les espaces, la somme
+    est donc celle du morceau entier sans recompter le morceau à chaque mot.
+    """
+    piece, piece_tokens = [], 0
+    for word in sentence.split():
+        if piece:
+            word_tokens = count_tokens(" " + word)
+            if piece_tokens + word_tokens > max_tokens:
+                yield " ".join(piece)
+                piece, piece_tokens = [], 0
+        if not piece:
+            word_tokens = count_tokens(word)
+        piece.append(word)
+        piece_tokens += word_tokens
+    if piece:
+        yield " ".join(piece)
+
+
+def iter_chunks(text_stream, max_tokens: int = 4000, overlap_tokens: int = 0, count_tokens=None):
+    """
+    Regroupe les phrases d'un flux de texte (itérable de morceaux) en blocs
+    d'au plus `max_tokens` tokens, chacun reprenant les dernières phrases du
+    précédent dans la limite de `overlap_tokens`.
+    """
+    count_tokens = count_tokens or token_counter()
+    current, current_tokens = [], 0
+    pending = ""
+
+    def sentences():
+        nonlocal pending
+        for piece in text_stream:
+            pending += piece
+            parts = _SENTENCE_END.split(pending)
+            # La dernière partie peut être une phrase incomplète : on l'attend
+            pending = parts.pop()
+            yield from parts
+        if pending.strip():
+            yield pending
+        pending = ""
+
+    for sentence in sentences():
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        n_tokens = count_tokens(sentence)
+        pieces = [(sentence, n_tokens)] if n_tokens <= max_tokens else [
+            (p, count_tokens(p)) for p in _split_long_sentence(sentence, max_tokens, count_tokens)
+        ]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield " ".join(s for s, _ in current)
+                # Recouvrement : reprendre les dernières phrases dans la limite du budget
+                overlap, overlap_count = [], 0
+                for s, t in reversed(current):
+                    if overlap_count + t > overlap_tokens or overlap_count + t + piece_tokens > max_tokens:
+                        break
+                    overlap.insert(0, (s, t))
+                    overlap_count += t
+                current, current_tokens = overlap, overlap_count
+            current.append((piece, piece_tokens))
+            current_tokens += piece_tokens
+
+    if current:
+        yield " ".join(s for s, _ in current)
+
+
+def chunk_text(text: str, max_tokens: int = 4000, overlap_tokens: int = 0, count_tokens=None) -> list[str]:
+    """Découpe un texte complet en blocs d'au plus `max_tokens` tokens alignés sur les phrases."""
+    return list(iter_chunks([text], max_tokens, overlap_tokens, count_tokens))
@@ -0,0 +1,451 @@
+"""
+Service local de traitement : les modèles restent chargés entre les jobs.
+Les scripts (process_gloabl.py, Whisper.py, resume.py) importent torch et Whisper, chargent un
+modèle, traitent une entrée puis s'arrêtent : sur des enregistrements courts, le démarrage
+coûte plus que le travail. Le démon reçoit les jobs sur un socket Unix (ou en TCP sur
+127.0.0.1), les exécute étape par étape (découpage, transcription, résumé) avec une limite de
+jobs simultanés par étape ; à chaque étape, les jobs en attente passent par ordre de priorité.
+La progression (étapes, segments transcrits, appels LLM) est renvoyée au client au fil de l'eau.
+
+Protocole : une requête JSON par connexion, puis des événements JSON, un par ligne.
+En TCP, chaque requête doit porter le jeton écrit au démarrage dans TOKEN_PATH (lisible
+seulement par l'utilisateur) ; les sorties des jobs restent sous le dossier racine du démon.
+Client : daemon_client.py
+"""
+
+import argparse
+import asyncio
+import heapq
+import hmac
+import itertools
+import json
+import os
+import secrets
+import socket
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+SOCKET_PATH = os.environ.get("RESUME_DAEMON_SOCKET", os.path.join(tempfile.gettempdir(), "resume_audio.sock"))
+TOKEN_PATH = os.environ.get("RESUME_DAEMON_TOKEN_FILE",
+                            os.path.join(os.path.expanduser("~"), ".resume_audio_daemon_token"))
+DEFAULT_PORT = 8765
+STAGE_LIMITS = {"split": 2, "transcription": 1, "summary": 4}
+JOB_TYPES = ["process", "transcribe", "summarize"]
+DEFAULT_PRIORITY = 5
+MAX_FINISHED = 100
+_FINAL_EVENTS = ("done", "error")
+
+
+class StageLimiter:
+    """Au plus `limit` jobs à la fois dans une étape ; les jobs en attente passent par priorité (plus petit d'abord)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int) -> None:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Place déjà attribuée pendant l'annulation : on la rend
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # La place passe directement au job en attente le plus prioritaire
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class Daemon:
+    """File des jobs, limites par étape et diffusion des événements aux clients qui suivent un job."""
+
+    def __init__(self, output_root: str, stage_limits: dict = STAGE_LIMITS, model_size: str = "base",
+                 backend: str | None = None, token: str | None = None):
+        self.output_root = os.path.realpath(output_root)
+        self.model_size = model_size
+        self.backend = backend
+        self.token = token
+        self.limiters = {stage: StageLimiter(limit) for stage, limit in stage_limits.items()}
+        self._model_limiters = {}
+        self.jobs = {}
+        self.stopping = asyncio.Event()
+        self._ids = itertools.count(1)
+        self._tasks = set()
+
+    # --- Événements ---
+
+    def publish(self, job: dict, event: dict) -> None:
+        event = {"job_id": job["id"], "time": round(time.time(), 3), **event}
+        job["events"].append(event)
+        for queue in job["subscribers"]:
+            queue.put_nowait(event)
+
+    async def follow(self, job: dict, writer) -> None:
+        """Rejoue les événements déjà émis du job puis transmet les suivants jusqu'à sa fin."""
+        queue = asyncio.Queue()
+        history = list(job["events"])
+        job["subscribers"].add(queue)
+        try:
+            for event in history:
+                await _send(writer, event)
+            if history and history[-1]["event"] in _FINAL_EVENTS:
+                return
+            while True:
+                event = await queue.get()
+                await _send(writer, event)
+                if event["event"] in _FINAL_EVENTS:
+                    return
+        finally:
+            job["subscribers"].discard(queue)
+
+    # --- Jobs ---
+
+    def submit(self, spec: dict) -> dict:
+        """Crée et lance un job ; un job identique encore en cours est réutilisé."""
+        job_type = spec.get("type")
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Type de job inconnu: {job_type} (choix: {', '.join(JOB_TYPES)})")
+        if not spec.get("input") or not os.path.exists(spec["input"]):
+            raise ValueError(f"Entrée introuvable: {spec.get('input')}")
+        priority = spec.get("priority", DEFAULT_PRIORITY)
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+            raise ValueError(f"Priorité invalide: {priority!r} (entier attendu)")
+        input_path = spec["input"]
+        options = dict(spec.get("options", {}))
+        if job_type == "transcribe":
+            options["output"] = self._output_path(input_path, options.get("output"))
+        elif job_type == "summarize":
+            input_path = self._job_directory(input_path)
+        for job in self.jobs.values():
+            if job["type"] == job_type and job["input"] == input_path and job["options"] == options \
+                    and job["status"] in ("queued", "running"):
+                return job
+
+        job = {
+            "id": f"{next(self._ids)}", "type": job_type, "input": input_path, "options": options,
+            "priority": int(priority), "status": "queued", "stage": None,
+            "created": time.time(), "events": [], "subscribers": set(),
+        }
+        self.jobs[job["id"]] = job
+        self.publish(job, {"event": "queued", "type": job_type, "input": job["input"], "priority": job["priority"]})
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _confined(self, path: str) -> str:
+        """Chemin résolu sous le dossier racine (relatif à celui-ci) ; refuse tout chemin qui en sort."""
+        resolved = os.path.realpath(os.path.join(self.output_root, path))
+        if os.path.commonpath([self.output_root, resolved]) != self.output_root:
+            raise ValueError(f"Chemin hors de {self.output_root}: {path}")
+        return resolved
+
+    def _output_path(self, input_path: str, output: str | None) -> str:
+        """Dossier de sortie d'un job, relatif au dossier racine ; refuse tout chemin qui en sort."""
+        from workspace import job_id_for
+
+        return self._confined(output or os.path.join(job_id_for(input_path), "transcriptions"))
+
+    def _job_directory(self, path: str) -> str:
+        """Dossier d'un job (<racine>/<nom>_<empreinte>) à résumer : le résumé est écrit dans ce dossier."""
+        resolved = self._confined(path)
+        if os.path.dirname(resolved) != self.output_root or not os.path.isdir(resolved):
+            raise ValueError(f"Dossier de job attendu directement sous {self.output_root}: {path}")
+        return resolved
+
+    @asynccontextmanager
+    async def _transcription(self, job: dict):
+        """
+        Étape de transcription, un seul job à la fois par modèle : openai-whisper installe ses
+        crochets de cache clé/valeur sur le décodeur partagé à chaque appel, deux transcriptions
+        simultanées sur la même instance mélangeraient leurs sorties. Des modèles différents
+        peuvent tourner en parallèle (dans la limite de l'étape).
+        """
+        from asr_backends import DEFAULT_BACKEND
+
+        options = job["options"]
+        key = (options.get("model", self.model_size), options.get("backend", self.backend) or DEFAULT_BACKEND)
+        model_limiter = self._model_limiters.setdefault(key, StageLimiter(1))
+        if model_limiter.active or model_limiter.waiting:
+            self.publish(job, {"event": "stage", "stage": "transcription", "status": "waiting", "model": key[0]})
+        async with model_limiter.slot(job["priority"]), self._stage(job, "transcription"):
+            yield
+
+    @asynccontextmanager
+    async def _stage(self, job: dict, stage: str):
+        limiter = self.limiters[stage]
+        job["stage"] = stage
+        if limiter.active >= limiter.limit or limiter.waiting:
+            self.publish(job, {"event": "stage", "stage": stage, "status": "waiting"})
+        async with limiter.slot(job["priority"]):
+            job["status"] = "running"
+            self.publish(job, {"event": "stage", "stage": stage, "status": "running"})
+            yield
+
+    async def _run(self, job: dict) -> None:
+        import metrics
+
+        loop = asyncio.get_running_loop()
+
+        def forward(event):
+            # Appelé depuis les threads de travail : l'événement est publié dans la boucle asyncio
+            loop.call_soon_threadsafe(self.publish, job, {"event": "metric", **event})
+
+        try:
+            with metrics.labels(job=job["id"]), metrics.listen(forward):
+                runner = {"process": self._process, "transcribe": self._transcribe,
+                          "summarize": self._summarize}[job["type"]]
+                result = await runner(job)
+            job["status"] = "done"
+            self.publish(job, {"event": "done", "result": result})
+        except Exception as e:
+            job["status"] = "error"
+            self.publish(job, {"event": "error", "error": str(e)})
+        finally:
+            job["stage"] = None
+            self._prune()
+
+    async def _process(self, job: dict) -> dict:
+        """Fichier audio/vidéo complet : découpage, transcription puis résumé (comme batch.py)."""
+        import job_manifest
+        from batch import _split_one, _summarize_one, resolve_api_key
+        from process_gloabl import transcribe_segments
+        from workspace import job_id_for, job_workspace
+
+        options = job["options"]
+        duration = options.get("duration", 30)
+        summarize = options.get("summarize", True)
+        api_key = resolve_api_key() if summarize else None
+        if summarize and not api_key:
+            raise RuntimeError("Clé OpenAI introuvable (variable OPENAI_API_KEY ou config.json) ; utilisez --no-summary")
+
+        with job_workspace(job_id_for(job["input"]), root=self.output_root) as ws:
+            params = job_manifest.pipeline_params(
+                duration, options.get("model", self.model_size), options.get("backend", self.backend),
+                options.get("batch_size", 1), options.get("pcm", False), options.get("export_mp3", True),
+                options.get("dedupe", True))
+            manifest = job_manifest.load(job["input"], params, path=ws["manifest"])
+            async with self._stage(job, "split"):
+                segments_paths = await asyncio.to_thread(
+                    _split_one, job["input"], ws, duration, manifest, options.get("pcm", False),
+                    options.get("export_mp3", True))
+            async with self._transcription(job):
+                transcriptions = await asyncio.to_thread(
+                    transcribe_segments, segments_paths, options.get("model", self.model_size), manifest=manifest,
+                    output_directory=ws["transcriptions"], backend=options.get("backend", self.backend),
+                    batch_size=options.get("batch_size", 1))
+            result = {"workspace": os.path.abspath(ws["base"]), "segments": len(transcriptions)}
+            if summarize:
+                async with self._stage(job, "summary"):
+                    await asyncio.to_thread(_summarize_one, transcriptions, ws, api_key, manifest,
+                                            options.get("dedupe", True))
+                result["summary"] = os.path.abspath(os.path.join(ws["resumes"], "resume_global.txt"))
+        return result
+
+    async def _transcribe(self, job: dict) -> dict:
+        """Dossier de segments déjà découpés (comme Whisper.py)."""
+        from Whisper import transcribe_directory
+
+        options = job["options"]
+        output_directory = options["output"]
+        async with self._transcription(job):
+            await asyncio.to_thread(transcribe_directory, job["input"], output_directory,
+                                    options.get("model", self.model_size), options.get("backend", self.backend))
+        return {"transcriptions": os.path.abspath(output_directory)}
+
+    async def _summarize(self, job: dict) -> dict:
+        """Dossier d'un job déjà transcrit sous le dossier racine (comme resume.py)."""
+        from batch import resolve_api_key
+        from process_gloabl import summarize_transcriptions
+        from resume import read_transcriptions
+        from workspace import job_workspace
+
+        api_key = resolve_api_key()
+        if not api_key:
+            raise RuntimeError("Clé OpenAI introuvable (variable OPENAI_API_KEY ou config.json)")
+        with job_workspace(os.path.basename(job["input"]), root=self.output_root) as ws:
+            transcriptions = read_transcriptions(ws["transcriptions"])
+            if not transcriptions:
+                raise RuntimeError(f"Aucune transcription trouvée dans {job['input']}")
+            async with self._stage(job, "summary"):
+                await asyncio.to_thread(summarize_transcriptions, transcriptions, ws["resumes"], api_key,
+                                        job["options"].get("dedupe", True))
+        return {"summary": os.path.abspath(os.path.join(ws["resumes"], "resume_global.txt"))}
+
+    def _prune(self) -> None:
+        finished = [job for job in self.jobs.values() if job["status"] in ("done", "error") and not job["subscribers"]]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self.jobs[job["id"]]
+
+    # --- Requêtes ---
+
+    def status(self) -> dict:
+        import whisper_models
+
+        return {
+            "jobs": [{key: job[key] for key in ("id", "type", "input", "priority", "status", "stage")}
+                     for job in self.jobs.values()],
+            "stages": {stage: {"limit": limiter.limit, "active": limiter.active, "waiting": limiter.waiting}
+                       for stage, limiter in self.limiters.items()},
+            "models": whisper_models.load_metrics(),
+        }
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            if self.token is not None and not hmac.compare_digest(str(request.get("token", "")), self.token):
+                raise ValueError("Jeton d'accès invalide (voir --token-file)")
+            action = request.get("action")
+            if action == "submit":
+                job = self.submit(request.get("job", {}))
+                await _send(writer, {"event": "accepted", "job_id": job["id"]})
+                if request.get("follow", True):
+                    await self.follow(job, writer)
+            elif action == "follow":
+                job = self.jobs.get(str(request.get("job_id")))
+                if job is None:
+                    raise ValueError(f"Job inconnu: {request.get('job_id')}")
+                await self.follow(job, writer)
+            elif action == "status":
+                await _send(writer, {"event": "status", **self.status()})
+            elif action == "shutdown":
+                await _send(writer, {"event": "shutdown", "running": len(self._tasks)})
+                self.stopping.set()
+            else:
+                raise ValueError(f"Action inconnue: {action}")
+        except (ValueError, json.JSONDecodeError) as e:
+            await _send(writer, {"event": "error", "error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Client parti : le job continue
+            pass
+        finally:
+            writer.close()
+
+    async def drain(self) -> None:
+        """Attend la fin des jobs en cours."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _send(writer, event: dict) -> None:
+    writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+def write_token(path: str = TOKEN_PATH) -> str:
+    """Génère un jeton d'accès et l'écrit dans un fichier lisible seulement par l'utilisateur."""
+    token = secrets.token_urlsafe(32)
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Supprime le socket d'un démon précédent arrêté brutalement ; refuse s'il répond encore."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+            return
+    raise RuntimeError(f"Un démon écoute déjà sur {path}")
+
+
+async def serve(socket_path: str | None = SOCKET_PATH, port: int | None = None, output_root: str = "jobs",
+                stage_limits: dict = STAGE_LIMITS, preload=("base",), backend: str | None = None,
+                token_path: str = TOKEN_PATH) -> None:
+    """
+    Lance le démon jusqu'à une requête shutdown (les jobs en cours sont terminés avant l'arrêt).
+    En TCP, un nouveau jeton d'accès est écrit dans token_path à chaque démarrage.
+    """
+    import whisper_models
+
+    os.makedirs(output_root, exist_ok=True)
+    token = write_token(token_path) if port is not None else None
+    daemon = Daemon(output_root, stage_limits, preload[0] if preload else "base", backend, token)
+    if preload:
+        # Tous les modèles demandés restent chargés (le registre n'en garde que max_models)
+        whisper_models.max_models = max(whisper_models.max_models, len(preload))
+        print(f"Chargement des modèles {', '.join(preload)}...")
+        await asyncio.to_thread(whisper_models.preload, preload, backend=backend)
+
+    if port is not None:
+        server = await asyncio.start_server(daemon.handle, "127.0.0.1", port)
+        where = f"127.0.0.1:{port} (jeton dans {token_path})"
+    else:
+        _remove_stale_socket(socket_path)
+        server = await asyncio.start_unix_server(daemon.handle, socket_path)
+        os.chmod(socket_path, 0o600)
+        where = socket_path
+    limits = ", ".join(f"{stage}={limit}" for stage, limit in stage_limits.items())
+    print(f"🟢 Démon prêt sur {where} (limites par étape : {limits})")
+
+    try:
+        async with server:
+            await daemon.stopping.wait()
+        print("Arrêt demandé : fin des jobs en cours...")
+        await daemon.drain()
+    finally:
+        if port is None and os.path.exists(socket_path):
+            os.remove(socket_path)
+    print("🔴 Démon arrêté.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service local de traitement (modèles gardés en mémoire).")
+    parser.add_argument("-s", "--socket", default=SOCKET_PATH, help=f"Socket Unix (défaut: {SOCKET_PATH})")
+    parser.add_argument("--port", type=int, nargs="?", const=DEFAULT_PORT,
+                        help=f"Écoute en TCP sur 127.0.0.1 au lieu du socket Unix (défaut: {DEFAULT_PORT})")
+    parser.add_argument("--token-file", default=TOKEN_PATH, help=f"Jeton d'accès en TCP (défaut: {TOKEN_PATH})")
+    parser.add_argument("-o", "--output", default="jobs",
+                        help="Dossier racine des jobs, seul endroit où ils écrivent (défaut: jobs)")
+    parser.add_argument("-m", "--models", nargs="*", default=["base"],
+                        help="Modèles Whisper chargés au démarrage ; le premier est le modèle par défaut (défaut: base)")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8, faster-whisper ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    for stage, limit in STAGE_LIMITS.items():
+        parser.add_argument(f"--{stage}-jobs", type=int, default=limit,
+                            help=f"Jobs simultanés à l'étape {stage} (défaut: {limit})"
+                                 + (" ; un seul par modèle" if stage == "transcription" else ""))
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None and not hasattr(socket, "AF_UNIX"):
+        port = DEFAULT_PORT
+    limits = {stage: getattr(args, f"{stage}_jobs") for stage in STAGE_LIMITS}
+    asyncio.run(serve(args.socket, port, args.output, limits, args.models, args.backend, args.token_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Client léger du démon (daemon.py) : envoie un job et affiche sa progression au fil de l'eau.
+N'importe que la bibliothèque standard : démarre instantanément, le travail et les modèles
+restent dans le démon.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+SOCKET_PATH = os.environ.get("RESUME_DAEMON_SOCKET", os.path.join(tempfile.gettempdir(), "resume_audio.sock"))
+TOKEN_PATH = os.environ.get("RESUME_DAEMON_TOKEN_FILE",
+                            os.path.join(os.path.expanduser("~"), ".resume_audio_daemon_token"))
+DEFAULT_PORT = 8765
+
+
+def request(payload: dict, socket_path: str = SOCKET_PATH, port: int | None = None, token_path: str = TOKEN_PATH):
+    """
+    Envoie une requête au démon et produit ses événements (dicts) jusqu'à la fin de la réponse.
+    En TCP, le jeton d'accès écrit par le démon dans token_path est joint à la requête.
+    """
+    if port is not None:
+        with open(token_path, "r", encoding="utf-8") as f:
+            payload = {**payload, "token": f.read().strip()}
+        sock = socket.create_connection(("127.0.0.1", port))
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    with sock, sock.makefile("rwb") as stream:
+        stream.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        stream.flush()
+        for line in stream:
+            yield json.loads(line)
+
+
+def format_event(event: dict) -> str | None:
+    """Ligne de progression lisible pour un événement, ou None s'il n'y a rien à afficher."""
+    kind = event["event"]
+    if kind == "accepted":
+        return f"📨 Job {event['job_id']} accepté"
+    if kind == "queued":
+        return f"🕒 En file (priorité {event['priority']}) : {event['input']}"
+    if kind == "stage":
+        if event["status"] == "waiting":
+            model = f" (modèle {event['model']} occupé)" if event.get("model") else ""
+            return f"⏳ {event['stage']} : en attente d'une place{model}"
+        return f"▶️  {event['stage']}"
+    if kind == "metric":
+        if event.get("metric") == "segment_seconds":
+            return f"   segment {event.get('segment')} transcrit ({event['value']:.1f} s)"
+        if event.get("metric") == "llm_request":
+            return f"   appel LLM ({event.get('tokens_in')} → {event.get('tokens_out')} tokens, " \
+                   f"{event['latency_seconds']:.1f} s)"
+        if "stage" in event and "seconds" in event:
+            return f"✅ {event['stage']} terminé en {event['seconds']:.1f} s"
+        return None
+    if kind == "done":
+        return "🎯 Terminé : " + ", ".join(f"{key}={value}" for key, value in event["result"].items())
+    if kind == "error":
+        return f"❌ {event['error']}"
+    if kind == "shutdown":
+        return f"🔴 Arrêt demandé ({event['running']} jobs en cours seront terminés)"
+    return None
+
+
+def print_status(status: dict) -> None:
+    print("Étapes :")
+    for stage, info in status["stages"].items():
+        print(f"  {stage:<14} {info['active']}/{info['limit']} actifs, {info['waiting']} en attente")
+    print("Modèles :")
+    for model in status["models"]:
+        state = "chargé" if model["loaded"] else "libéré"
+        print(f"  {model['size']} ({model['backend']}, {model['device']}) {state}, {model['hits']} réutilisations")
+    print("Jobs :")
+    for job in status["jobs"]:
+        stage = f" [{job['stage']}]" if job["stage"] else ""
+        print(f"  {job['id']:>4} {job['status']:<8}{stage} p{job['priority']} {job['type']} {job['input']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envoie un travail au démon de traitement et suit sa progression.")
+    parser.add_argument("-s", "--socket", default=SOCKET_PATH, help=f"Socket Unix du démon (défaut: {SOCKET_PATH})")
+    parser.add_argument("--port", type=int, nargs="?", const=DEFAULT_PORT,
+                        help=f"Démon en TCP sur 127.0.0.1 (défaut: {DEFAULT_PORT})")
+    parser.add_argument("--token-file", default=TOKEN_PATH, help=f"Jeton d'accès en TCP (défaut: {TOKEN_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def job_parser(name, help_text, input_help):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("input", help=input_help)
+        sub.add_argument("-p", "--priority", type=int, default=5, help="Priorité, plus petit = plus urgent (défaut: 5)")
+        sub.add_argument("--detach", action="store_true", help="Rendre la main sans suivre la progression")
+        return sub
+
+    process = job_parser("process", "Fichier complet : découpage, transcription, résumé", "Fichier audio ou vidéo")
+    process.add_argument("-d", "--duration", type=int, default=30, help="Durée des segments en minutes (défaut: 30)")
+    process.add_argument("-m", "--model", help="Taille du modèle Whisper (défaut: celui du démon)")
+    process.add_argument("-b", "--backend", help="Moteur de transcription (défaut: celui du démon)")
+    process.add_argument("--batch-size", type=int, default=1, help="Fenêtres de 30 s décodées par lot (défaut: 1)")
+    process.add_argument("--no-summary", action="store_true", help="Ne pas générer de résumé")
+    transcribe = job_parser("transcribe", "Transcrit un dossier de segments (comme Whisper.py)", "Dossier des segments")
+    transcribe.add_argument("-o", "--output", help="Dossier des transcriptions, relatif au dossier racine du démon "
+                                                   "(défaut: <nom>_<empreinte>/transcriptions)")
+    transcribe.add_argument("-m", "--model", help="Taille du modèle Whisper (défaut: celui du démon)")
+    transcribe.add_argument("-b", "--backend", help="Moteur de transcription (défaut: celui du démon)")
+    job_parser("summarize", "Résume un job déjà transcrit (comme resume.py)", "Dossier du job (jobs/<nom>_<empreinte>)")
+    follow = commands.add_parser("follow", help="Suit un job déjà envoyé")
+    follow.add_argument("job_id")
+    commands.add_parser("status", help="Jobs, places par étape et modèles chargés")
+    commands.add_parser("shutdown", help="Arrête le démon après les jobs en cours")
+    args = parser.parse_args()
+
+    if args.command in ("process", "transcribe", "summarize"):
+        # Le démon peut tourner dans un autre dossier : entrée en chemin absolu
+        # (la sortie reste relative au dossier racine du démon)
+        options = {}
+        for key in ("duration", "model", "backend", "batch_size"):
+            if getattr(args, key, None) is not None:
+                options[key] = getattr(args, key)
+        if getattr(args, "output", None):
+            options["output"] = args.output
+        if getattr(args, "no_summary", False):
+            options["summarize"] = False
+        payload = {"action": "submit", "follow": not args.detach, "job": {
+            "type": args.command, "input": os.path.abspath(args.input), "priority": args.priority, "options": options,
+        }}
+    elif args.command == "follow":
+        payload = {"action": "follow", "job_id": args.job_id}
+    else:
+        payload = {"action": args.command}
+
+    failed = False
+    try:
+        for event in request(payload, args.socket, args.port, args.token_file):
+            if event["event"] == "status":
+                print_status(event)
+                continue
+            line = format_event(event)
+            if line:
+                print(line, flush=True)
+            failed = failed or event["event"] == "error"
+    except (FileNotFoundError, ConnectionRefusedError):
+        where = f"127.0.0.1:{args.port}" if args.port else args.socket
+        print(f"❌ Aucun démon sur {where} (lancez: python src/daemon.py)", file=sys.stderr)
+        raise SystemExit(2)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Nettoyage des transcriptions avant le résumé.
+Whisper sur CPU répète souvent la même phrase en boucle sur les silences, et les coupes fixes
+du découpage dupliquent des mots à la jonction de deux segments. Ce module retire :
+- les boucles de répétition (un n-gramme répété au moins min_repeats fois d'affilée, sur au
+  moins min_chars caractères), dont seule la première occurrence est gardée ; une répétition
+  courte de la parole réelle (« oui oui oui oui ») est conservée ;
+- le recouvrement aux jonctions : le plus long suffixe d'un segment qui est aussi le préfixe
+  du suivant (aligné par hachage glissant, au moins min_overlap mots) est retiré du début du suivant.
+Les mots sont comparés sans casse ni ponctuation ; chaque passe est linéaire en nombre de mots.
+"""
+
+import argparse
+import os
+import re
+
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+_PUNCT = re.compile(r"[^\w']+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Mots du texte (séparés par les espaces, ponctuation comprise)."""
+    return text.split()
+
+
+def _token_ids(tokens: list[str], vocab: dict) -> list[int]:
+    """Identifiant entier de chaque mot normalisé (partagé entre les segments via vocab)."""
+    return [vocab.setdefault(_PUNCT.sub("", token.lower()), len(vocab) + 1) for token in tokens]
+
+
+def _prefix_hashes(ids: list[int]) -> list[int]:
+    """Hachages polynomiaux des préfixes : h[i] est le hachage de ids[:i]."""
+    hashes = [0]
+    for token_id in ids:
+        hashes.append((hashes[-1] * _BASE + token_id) % _MOD)
+    return hashes
+
+
+def _powers(n: int) -> list[int]:
+    powers = [1]
+    for _ in range(n):
+        powers.append(powers[-1] * _BASE % _MOD)
+    return powers
+
+
+def _span_hash(hashes: list[int], powers: list[int], start: int, end: int) -> int:
+    return (hashes[end] - hashes[start] * powers[end - start]) % _MOD
+
+
+def remove_loops(tokens: list[str], ids: list[int], max_period: int = 12, min_repeats: int = 3,
+                 min_chars: int = 40) -> tuple[list[str], list[int], int]:
+    """
+    Retire les boucles de répétition : pour chaque longueur de n-gramme p (1 à max_period),
+    une suite d'au moins min_repeats copies consécutives, longue d'au moins min_chars caractères,
+    est réduite à sa première copie. Une passe par p, chacune linéaire : les copies sont repérées
+    par la longueur des plages où ids[i] == ids[i + p].
+    Retourne (mots, identifiants, nombre de mots retirés).
+    """
+    removed = 0
+    for period in range(1, max_period + 1):
+        n = len(ids)
+        if n < 2 * period:
+            break
+        # Caractères cumulés (espace compris) : longueur d'une plage en O(1)
+        chars = [0]
+        for token in tokens:
+            chars.append(chars[-1] + len(token) + 1)
+        keep = [True] * n
+        run_start = 0
+        for i in range(n - period + 1):
+            if i < n - period and ids[i] == ids[i + period]:
+                continue
+            # Plage [run_start, i + period) de période p
+            span = i + period - run_start
+            copies = span // period
+            if copies >= min_repeats and chars[run_start + copies * period] - chars[run_start] - 1 >= min_chars:
+                for j in range(run_start + period, run_start + copies * period):
+                    keep[j] = False
+            run_start = i + 1
+        if not all(keep):
+            removed += keep.count(False)
+            tokens = [token for token, kept in zip(tokens, keep) if kept]
+            ids = [token_id for token_id, kept in zip(ids, keep) if kept]
+    return tokens, ids, removed
+
+
+def seam_overlap(previous_ids: list[int], ids: list[int], max_overlap: int = 30, min_overlap: int = 5) -> int:
+    """
+    Longueur du plus long suffixe de previous_ids (au plus max_overlap mots) qui est aussi
+    un préfixe de ids, ou 0 s'il fait moins de min_overlap mots. Les deux fenêtres sont hachées
+    une seule fois, puis chaque longueur est testée en O(1) (et vérifiée mot à mot si les hachages concordent).
+    """
+    window = min(max_overlap, len(previous_ids), len(ids))
+    if window < min_overlap:
+        return 0
+    tail = previous_ids[-window:]
+    head = ids[:window]
+    tail_hashes = _prefix_hashes(tail)
+    head_hashes = _prefix_hashes(head)
+    powers = _powers(window)
+    for length in range(window, min_overlap - 1, -1):
+        if _span_hash(tail_hashes, powers, window - length, window) == head_hashes[length] \
+                and tail[window - length:] == head[:length]:
+            return length
+    return 0
+
+
+def clean_transcriptions(transcriptions: list[str], max_period: int = 12, min_repeats: int = 3,
+                         max_overlap: int = 30, min_overlap: int = 5, min_chars: int = 40) -> tuple[list[str], dict]:
+    """
+    Nettoie une liste de transcriptions de segments consécutifs (boucles puis jonctions).
+    Retourne les textes nettoyés (un par segment, mots séparés par des espaces) et les
+    statistiques {"tokens_in", "tokens_out", "loop_tokens_removed", "seam_tokens_removed"}.
+    """
+    vocab = {}
+    stats = {"tokens_in": 0, "tokens_out": 0, "loop_tokens_removed": 0, "seam_tokens_removed": 0}
+    cleaned = []
+    previous_ids = []
+    for text in transcriptions:
+        tokens = tokenize(text)
+        stats["tokens_in"] += len(tokens)
+        ids = _token_ids(tokens, vocab)
+        overlap = seam_overlap(previous_ids, ids, max_overlap, min_overlap)
+        tokens, ids = tokens[overlap:], ids[overlap:]
+        tokens, ids, removed = remove_loops(tokens, ids, max_period, min_repeats, min_chars)
+        stats["seam_tokens_removed"] += overlap
+        stats["loop_tokens_removed"] += removed
+        stats["tokens_out"] += len(tokens)
+        cleaned.append(" ".join(tokens))
+        # Un segment vidé par le nettoyage ne remplace pas la fin du précédent
+        if ids:
+            previous_ids = ids
+    return cleaned, stats
+
+
+def report(stats: dict) -> str:
+    """Résumé lisible des statistiques de clean_transcriptions."""
+    removed = stats["tokens_in"] - stats["tokens_out"]
+    share = removed / stats["tokens_in"] * 100 if stats["tokens_in"] else 0.0
+    return (f"🧹 {removed} mots retirés sur {stats['tokens_in']} ({share:.1f} %) : "
+            f"{stats['loop_tokens_removed']} en boucles de répétition, "
+            f"{stats['seam_tokens_removed']} aux jonctions des segments")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retire les répétitions et les recouvrements des transcriptions.")
+    parser.add_argument("input", nargs="?", default="transcriptions",
+                        help="Dossier des transcriptions segment_XX.txt (défaut: transcriptions)")
+    parser.add_argument("-o", "--output", help="Fichier du texte nettoyé (défaut: aucun, statistiques seulement)")
+    parser.add_argument("--max-period", type=int, default=12, help="Longueur max. d'un n-gramme répété (défaut: 12)")
+    parser.add_argument("--min-repeats", type=int, default=3, help="Répétitions minimales d'une boucle (défaut: 3)")
+    parser.add_argument("--min-chars", type=int, default=40,
+                        help="Longueur min. d'une boucle retirée, en caractères (défaut: 40)")
+    parser.add_argument("--max-overlap", type=int, default=30, help="Recouvrement max. aux jonctions, en mots (défaut: 30)")
+    parser.add_argument("--min-overlap", type=int, default=5, help="Recouvrement min. aux jonctions, en mots (défaut: 5)")
+    args = parser.parse_args()
+
+    transcriptions = []
+    for name in sorted(os.listdir(args.input)):
+        if name.endswith(".txt") and name != "transcription_complete.txt":
+            with open(os.path.join(args.input, name), "r", encoding="utf-8") as f:
+                transcriptions.append(f.read())
+    if not transcriptions:
+        print(f"❌ Aucune transcription trouvée dans {args.input}")
+        return
+
+    cleaned, stats = clean_transcriptions(transcriptions, args.max_period, args.min_repeats, args.max_overlap,
+                                          args.min_overlap, args.min_chars)
+    print(report(stats))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(cleaned))
+        print(f"✅ Texte nettoyé enregistré : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
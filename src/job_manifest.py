@@ -0,0 +1,148 @@
+"""
+Manifeste de job (JSON) pour reprendre un traitement interrompu.
+Chaque étape y enregistre ses unités terminées : segments écrits, segments transcrits
+(avec somme de contrôle du texte) et résumé. Une relance repart de la première unité
+manquante au lieu de tout recommencer.
+Les paramètres sont rangés par étape (pipeline_params) : changer le modèle de transcription
+refait la transcription et le résumé mais garde le découpage ; changer la durée des segments
+refait tout.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+MANIFEST_PATH = "job_manifest.json"
+STAGES = ("split", "transcribe", "summary")
+
+
+def _input_signature(input_path: str) -> dict:
+    stat = os.stat(input_path)
+    return {"path": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _checksum(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def pipeline_params(segment_duration_min: int = 30, model_size: str = "base", backend: str | None = None,
+                    batch_size: int = 1, pcm: bool = False, export_mp3: bool = True, dedupe: bool = True) -> dict:
+    """Paramètres d'un job, par étape, tels qu'ils sont comparés à la reprise."""
+    from asr_backends import DEFAULT_BACKEND
+
+    return {
+        "split": {"segment_duration_min": segment_duration_min, "pcm": pcm, "export_mp3": export_mp3},
+        # Sans moteur explicite, celui de la variable ASR_BACKEND au moment du lancement
+        "transcribe": {"model": model_size, "backend": backend or DEFAULT_BACKEND, "batch_size": batch_size},
+        "summary": {"dedupe": dedupe},
+    }
+
+
+def _reset_from(manifest: dict, stage: str) -> None:
+    """Oublie les unités terminées de `stage` et des étapes suivantes."""
+    fresh = _new_manifest(manifest["input"]["path"], manifest["params"], manifest["input"])
+    for name in STAGES[STAGES.index(stage):]:
+        manifest[name] = fresh[name]
+
+
+def _new_manifest(input_path: str, params: dict, signature: dict | None = None) -> dict:
+    return {
+        "input": signature or _input_signature(input_path),
+        "params": params,
+        "split": {"done": False, "segments": []},
+        "transcribe": {},
+        "summary": {"done": False, "path": None},
+    }
+
+
+def load(input_path: str, params: dict, path: str = MANIFEST_PATH) -> dict:
+    """
+    Charge le manifeste du job. S'il concerne un autre fichier d'entrée (ou un fichier
+    modifié), un manifeste vierge est retourné. params est rangé par étape (pipeline_params) :
+    la première étape dont les paramètres ont changé est refaite, ainsi que les suivantes.
+    """
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("input") == _input_signature(input_path):
+                previous = manifest.get("params") or {}
+                manifest["params"] = params
+                manifest["_path"] = path
+                changed = [stage for stage in STAGES if previous.get(stage) != params.get(stage)]
+                if changed:
+                    _reset_from(manifest, changed[0])
+                return manifest
+        except (json.JSONDecodeError, OSError, KeyError):
+            pass
+    manifest = _new_manifest(input_path, params)
+    manifest["_path"] = path
+    return manifest
+
+
+def save(manifest: dict) -> None:
+    """Écrit le manifeste de façon atomique (fichier temporaire puis os.replace)."""
+    path = manifest["_path"]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in manifest.items() if k != "_path"}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _segment_size(path: str) -> int | None:
+    """Taille d'un segment : fichier MP3, ou sa plage dans l'intermédiaire PCM (segments .pcm sans fichier)."""
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    from pcm_store import segment_nbytes
+
+    return segment_nbytes(path)
+
+
+def completed_segments(manifest: dict) -> list[str] | None:
+    """Chemins des segments si le découpage est terminé et que tous les fichiers sont intacts, sinon None."""
+    split = manifest["split"]
+    if not split["done"]:
+        return None
+    for segment in split["segments"]:
+        size = _segment_size(segment["path"])
+        if size is None or size != segment["size"]:
+            return None
+    return [segment["path"] for segment in split["segments"]]
+
+
+def record_segments(manifest: dict, segments_paths):
+    """Enregistre chaque segment produit par le découpage puis le marque terminé ; produit les chemins."""
+    manifest["split"] = {"done": False, "segments": []}
+    for path in segments_paths:
+        manifest["split"]["segments"].append({"path": path, "size": _segment_size(path)})
+        save(manifest)
+        yield path
+    manifest["split"]["done"] = True
+    save(manifest)
+
+
+def transcribed_text(manifest: dict, index: int) -> str | None:
+    """Texte du segment `index` s'il a déjà été transcrit et que le fichier correspond à sa somme de contrôle."""
+    unit = manifest["transcribe"].get(str(index))
+    if not unit or not os.path.exists(unit["path"]):
+        return None
+    with open(unit["path"], "r", encoding="utf-8") as f:
+        text = f.read()
+    return text if _checksum(text) == unit["sha256"] else None
+
+
+def record_transcription(manifest: dict, index: int, output_path: str, text: str) -> None:
+    manifest["transcribe"][str(index)] = {"path": output_path, "sha256": _checksum(text)}
+    save(manifest)
+
+
+def summary_done(manifest: dict) -> bool:
+    summary = manifest["summary"]
+    return summary["done"] and summary["path"] is not None and os.path.exists(summary["path"])
+
+
+def record_summary(manifest: dict, output_path: str) -> None:
+    manifest["summary"] = {"done": True, "path": output_path}
+    save(manifest)
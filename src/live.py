@@ -0,0 +1,172 @@
+"""
+Transcription en quasi temps réel d'une source audio continue (stdin, pipe, flux réseau
+ou fichier en cours d'écriture).
+L'audio est transcrit par fenêtres glissantes : des lignes provisoires sont émises toutes
+les `step` secondes, et les mots sortis de la zone de recouvrement sont validés
+définitivement. Les recouvrements sont recousus sur les horodatages des mots (et leur texte)
+pour ne pas répéter de mots. Le modèle est chargé une seule fois (whisper_models).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def open_source(source: str, raw: bool = False, follow: bool = False) -> subprocess.Popen:
+    """
+    Lance ffmpeg pour décoder la source en PCM float32 mono 16 kHz sur sa sortie standard.
+    source "-" lit l'entrée standard ; raw indique du PCM s16le 16 kHz mono brut ;
+    follow continue à lire un fichier qui grossit (enregistrement en cours).
+    """
+    cmd = ["ffmpeg", "-v", "error"]
+    if raw:
+        cmd += ["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1"]
+    if follow and source != "-":
+        cmd += ["-follow", "1"]
+    cmd += ["-i", "pipe:0" if source == "-" else source, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-f", "f32le", "pipe:1"]
+    return subprocess.Popen(cmd, stdin=sys.stdin.buffer if source == "-" else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE)
+
+
+def iter_audio_chunks(stream, chunk_sec: float = 0.5):
+    """Lit le flux PCM float32 par petits blocs dès qu'ils arrivent."""
+    chunk_bytes = int(chunk_sec * SAMPLE_RATE) * 4
+    pending = b""
+    while True:
+        data = stream.read1(chunk_bytes) if hasattr(stream, "read1") else stream.read(chunk_bytes)
+        if not data:
+            break
+        pending += data
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            yield np.frombuffer(pending[:usable], dtype=np.float32)
+            pending = pending[usable:]
+
+
+def _transcribe_words(model, audio: np.ndarray, offset: float, language: str) -> list[tuple]:
+    """Mots (début absolu, fin absolue, texte) de la fenêtre audio."""
+    result = model.transcribe(audio, language=language, word_timestamps=True, condition_on_previous_text=False)
+    return [
+        (offset + word["start"], offset + word["end"], word["word"].strip())
+        for segment in result["segments"]
+        for word in segment.get("words", [])
+        if word["word"].strip()
+    ]
+
+
+def _normalize(word: str) -> str:
+    return word.lower().strip(".,;:!?…\"'«»")
+
+
+def _drop_repeated_prefix(committed_tail: list[str], words: list[tuple]) -> list[tuple]:
+    """Retire en tête de `words` les mots qui répètent la fin du texte déjà validé."""
+    texts = [_normalize(w[2]) for w in words]
+    for k in range(min(len(committed_tail), len(texts)), 0, -1):
+        if committed_tail[-k:] == texts[:k]:
+            return words[k:]
+    return words
+
+
+def live_transcribe(chunks, model, window_sec: float = 15.0, step_sec: float = 3.0, overlap_sec: float = 3.0,
+                    language: str = "fr"):
+    """
+    Transcrit un flux de blocs audio et produit des événements
+    {"type": "partial" | "final", "start", "end", "text"} (temps absolus en secondes).
+    La latence est bornée par step_sec plus le temps de transcription d'une fenêtre.
+    """
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0.0
+    committed_until = 0.0
+    committed_tail = []
+    since_last = 0
+
+    def event(kind, words):
+        return {"type": kind, "start": round(words[0][0], 2), "end": round(words[-1][1], 2),
+                "text": " ".join(w[2] for w in words)}
+
+    def pending_words():
+        words = _transcribe_words(model, buffer, buffer_start, language)
+        # Recoudre le recouvrement : ignorer ce qui précède la partie déjà validée
+        words = [w for w in words if w[0] >= committed_until - 0.05]
+        return _drop_repeated_prefix(committed_tail, words)
+
+    for chunk in chunks:
+        buffer = np.concatenate((buffer, chunk))
+        since_last += len(chunk)
+        if since_last < step_sec * SAMPLE_RATE:
+            continue
+        since_last = 0
+
+        words = pending_words()
+        buffer_end = buffer_start + len(buffer) / SAMPLE_RATE
+        if buffer_end - buffer_start < window_sec:
+            if words:
+                yield event("partial", words)
+            continue
+
+        # Fenêtre pleine : valider les mots sortis de la zone de recouvrement
+        cutoff = buffer_end - overlap_sec
+        final = [w for w in words if w[1] <= cutoff]
+        remaining = words[len(final):]
+        if final:
+            yield event("final", final)
+            committed_until = final[-1][1]
+            committed_tail = (committed_tail + [_normalize(w[2]) for w in final])[-10:]
+        if remaining:
+            yield event("partial", remaining)
+
+        # Ne garder que l'audio non validé (au plus la zone de recouvrement s'il n'y a rien en attente)
+        keep_from = min(cutoff, remaining[0][0]) if remaining else cutoff
+        keep_from = max(keep_from, buffer_start)
+        buffer = buffer[int((keep_from - buffer_start) * SAMPLE_RATE):]
+        buffer_start = keep_from
+
+    if len(buffer):
+        words = pending_words()
+        if words:
+            yield event("final", words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription en direct d'un flux audio.")
+    parser.add_argument("source", nargs="?", default="-", help="Fichier, URL ou '-' pour l'entrée standard (défaut)")
+    parser.add_argument("--raw", action="store_true", help="Entrée en PCM s16le 16 kHz mono brut")
+    parser.add_argument("--follow", action="store_true", help="Suivre un fichier en cours d'écriture")
+    parser.add_argument("-m", "--model", default="base", help="Taille du modèle Whisper (défaut: base)")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8, faster-whisper ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    parser.add_argument("--window", type=float, default=15.0, help="Durée max d'une fenêtre en secondes (défaut: 15)")
+    parser.add_argument("--step", type=float, default=3.0, help="Intervalle entre deux transcriptions (défaut: 3)")
+    parser.add_argument("--overlap", type=float, default=3.0, help="Recouvrement entre fenêtres (défaut: 3)")
+    parser.add_argument("--jsonl", action="store_true", help="Sortie en JSON lines")
+    args = parser.parse_args()
+
+    import whisper_models
+    from transcript_format import format_timestamp
+
+    model = whisper_models.get_model(args.model, backend=args.backend)
+    process = open_source(args.source, args.raw, args.follow)
+    try:
+        chunks = iter_audio_chunks(process.stdout)
+        for ev in live_transcribe(chunks, model, args.window, args.step, args.overlap):
+            if args.jsonl:
+                print(json.dumps(ev, ensure_ascii=False), flush=True)
+            elif ev["type"] == "final":
+                print(f"\r\033[K[{format_timestamp(ev['start'])[:8]}] {ev['text']}", flush=True)
+            else:
+                print(f"\r\033[K… {ev['text'][-120:]}", end="", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
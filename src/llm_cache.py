@@ -0,0 +1,235 @@
+"""
+Cache disque des réponses LLM.
+La clé est le hash du fournisseur, du modèle, du prompt et du texte envoyé : relancer un
+résumé sur des transcriptions inchangées ne rappelle pas l'API. Les entrées expirent après
+LLM_CACHE_TTL secondes et les moins récemment utilisées sont supprimées au-delà de
+LLM_CACHE_MAX_BYTES (même stockage atomique que transcription_cache).
+Deux requêtes identiques simultanées ne font qu'un seul appel (la seconde attend le résultat
+de la première) ; les erreurs temporaires (429, 5xx, coupure réseau) sont relancées avec un
+délai exponentiel qui respecte l'en-tête Retry-After.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import transcription_cache
+
+CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+TTL_SEC = float(os.environ.get("LLM_CACHE_TTL", 30 * 24 * 3600))
+ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+RETRIES = 5
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def cache_key(provider: str, model: str, prompt: str, text: str) -> str:
+    """Hash SHA-256 du fournisseur, du modèle, du prompt et du texte."""
+    params = {"provider": provider, "model": model, "prompt": prompt}
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def get(key: str, cache_dir: str = CACHE_DIR, ttl_sec: float = TTL_SEC) -> str | None:
+    """Réponse en cache, ou None si absente ou expirée (l'entrée expirée est supprimée)."""
+    entry = transcription_cache.get(key, cache_dir)
+    if entry is None:
+        return None
+    if time.time() - entry.get("created", 0) > ttl_sec:
+        transcription_cache.remove(key, cache_dir)
+        return None
+    return entry["response"]
+
+
+def put(key: str, response: str, provider: str, model: str, cache_dir: str = CACHE_DIR,
+        max_bytes: int = MAX_BYTES) -> None:
+    """Enregistre une réponse (écriture atomique puis limite de taille)."""
+    entry = {"provider": provider, "model": model, "created": time.time(), "response": response}
+    transcription_cache.put(key, entry, cache_dir, max_bytes)
+
+
+def _status_code(error: BaseException) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_delay(error: BaseException, attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float | None:
+    """
+    Délai avant la tentative suivante, ou None si l'erreur n'est pas temporaire.
+    Retry-After (ou retry_after sur l'erreur) est respecté ; sinon délai exponentiel avec gigue.
+    """
+    status = _status_code(error)
+    if status is not None:
+        if status not in (408, 409, 429) and status < 500:
+            return None
+    elif not isinstance(error, (ConnectionError, TimeoutError)) \
+            and not any(word in type(error).__name__ for word in ("RateLimit", "Timeout", "Connection")):
+        return None
+
+    retry_after = getattr(error, "retry_after", None)
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if retry_after is None and headers.get("retry-after-ms") is not None:
+            retry_after = float(headers["retry-after-ms"]) / 1000
+        elif retry_after is None and headers.get("retry-after") is not None:
+            retry_after = float(headers["retry-after"])
+    except (TypeError, ValueError):
+        retry_after = None
+    if retry_after is not None:
+        return max(0.0, float(retry_after))
+    return min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def _record(result: str) -> None:
+    import metrics
+
+    metrics.inc("llm_cache_total", 1, result=result)
+
+
+def call_with_retry(call, retries: int = RETRIES, base_delay: float = 1.0):
+    """Appelle call() en relançant les erreurs temporaires (au plus `retries` nouvelles tentatives)."""
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            delay = retry_delay(e, attempt, base_delay)
+            if delay is None or attempt == retries:
+                raise
+            _record("retry")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(call, retries: int = RETRIES, base_delay: float = 1.0):
+    """Version asynchrone de call_with_retry : call() retourne une coroutine."""
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            delay = retry_delay(e, attempt, base_delay)
+            if delay is None or attempt == retries:
+                raise
+            _record("retry")
+            await asyncio.sleep(delay)
+
+
+def cached(provider: str, model: str, prompt: str, text: str, call, cache_dir: str = CACHE_DIR,
+           ttl_sec: float = TTL_SEC, retries: int = RETRIES, base_delay: float = 1.0):
+    """
+    Réponse de call() (sans argument) pour (provider, model, prompt, text), lue du cache si possible.
+    Les appels identiques lancés en même temps depuis plusieurs threads n'interrogent l'API qu'une fois.
+    """
+    if not ENABLED:
+        return call_with_retry(call, retries, base_delay)
+    key = cache_key(provider, model, prompt, text)
+    response = get(key, cache_dir, ttl_sec)
+    if response is not None:
+        _record("hit")
+        return response
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        _record("coalesced")
+        return future.result()
+
+    try:
+        _record("miss")
+        response = call_with_retry(call, retries, base_delay)
+        if isinstance(response, str):
+            put(key, response, provider, model, cache_dir)
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+
+def cached_complete(complete, provider: str, model: str, cache_dir: str = CACHE_DIR, ttl_sec: float = TTL_SEC,
+                    retries: int = RETRIES, base_delay: float = 1.0):
+    """
+    Enveloppe une fonction `complete(prompt, text)` asynchrone (voir summarizer) : cache,
+    une seule requête pour des appels identiques simultanés, relance des erreurs temporaires.
+    """
+    inflight = {}
+
+    async def run(key, prompt, text):
+        try:
+            _record("miss")
+            response = await call_with_retry_async(lambda: complete(prompt, text), retries, base_delay)
+            if isinstance(response, str):
+                await asyncio.to_thread(put, key, response, provider, model, cache_dir)
+            return response
+        finally:
+            del inflight[key]
+
+    async def wrapper(prompt, text):
+        if not ENABLED:
+            return await call_with_retry_async(lambda: complete(prompt, text), retries, base_delay)
+        key = cache_key(provider, model, prompt, text)
+        response = get(key, cache_dir, ttl_sec)
+        if response is not None:
+            _record("hit")
+            return response
+        task = inflight.get(key)
+        if task is None:
+            task = inflight[key] = asyncio.ensure_future(run(key, prompt, text))
+        else:
+            _record("coalesced")
+        # shield : l'annulation d'un appelant n'annule pas la requête partagée
+        return await asyncio.shield(task)
+
+    return wrapper
+
+
+def stats(cache_dir: str = CACHE_DIR) -> dict:
+    """Nombre d'entrées, taille totale et entrées expirées du cache."""
+    entries = size = expired = 0
+    now = time.time()
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(root, name)
+            entries += 1
+            size += os.path.getsize(path)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    expired += now - json.load(f).get("created", 0) > TTL_SEC
+            except (OSError, json.JSONDecodeError):
+                pass
+    return {"entries": entries, "bytes": size, "expired": expired}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache disque des réponses LLM.")
+    parser.add_argument("command", choices=["stats", "clear"], help="stats : contenu du cache ; clear : le vider")
+    parser.add_argument("-d", "--dir", default=CACHE_DIR, help=f"Dossier du cache (défaut: {CACHE_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        info = stats(args.dir)
+        print(f"{info['entries']} réponses, {info['bytes'] / 1024 ** 2:.1f} Mo, {info['expired']} expirées")
+    else:
+        removed = transcription_cache.evict(args.dir, 0)
+        print(f"🧹 {removed} réponses supprimées de {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
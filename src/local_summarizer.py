@@ -0,0 +1,90 @@
+"""
+Résumé local avec BART (Hugging Face).
+Le pipeline est chargé une seule fois par processus puis réutilisé ; les morceaux
+passent dans le modèle par lots (padding automatique) sous torch.inference_mode.
+Une variante CPU quantifiée dynamiquement en int8 est disponible.
+"""
+
+import argparse
+import time
+
+DEFAULT_MODEL = "facebook/bart-large-cnn"
+
+_pipelines = {}
+
+
+def get_pipeline(model: str = DEFAULT_MODEL, quantize: bool = False):
+    """Retourne le pipeline de résumé (chargé une seule fois par modèle et variante)."""
+    key = (model, quantize)
+    if key not in _pipelines:
+        import torch
+        from transformers import pipeline
+
+        summarizer = pipeline("summarization", model=model, tokenizer=model)
+        if quantize:
+            # Quantification dynamique int8 des couches linéaires (CPU uniquement)
+            summarizer.model = torch.quantization.quantize_dynamic(
+                summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        summarizer.model.eval()
+        _pipelines[key] = summarizer
+    return _pipelines[key]
+
+
+def token_counter(model: str = DEFAULT_MODEL, quantize: bool = False):
+    """Compte les tokens avec le tokenizer du pipeline (hors tokens spéciaux)."""
+    tokenizer = get_pipeline(model, quantize).tokenizer
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def summarize_chunks(chunks: list[str], batch_size: int = 8, quantize: bool = False, model: str = DEFAULT_MODEL,
+                     max_length: int = 130, min_length: int = 30) -> list[str]:
+    """Résume chaque morceau, par lots de `batch_size`, et retourne les résumés dans l'ordre."""
+    import torch
+
+    summarizer = get_pipeline(model, quantize)
+    with torch.inference_mode():
+        outputs = summarizer(
+            chunks,
+            batch_size=batch_size,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,
+            truncation=True,
+        )
+    return [output["summary_text"] for output in outputs]
+
+
+def benchmark_throughput(chunks: list[str], batch_sizes=(1, 4, 8, 16), quantize_options=(False, True)) -> dict:
+    """Mesure le débit (morceaux par seconde) selon la taille de lot et la quantification."""
+    results = {}
+    for quantize in quantize_options:
+        get_pipeline(quantize=quantize)  # chargement hors mesure
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            summarize_chunks(chunks, batch_size=batch_size, quantize=quantize)
+            elapsed = time.perf_counter() - start
+            results[(quantize, batch_size)] = len(chunks) / elapsed
+            variant = "int8" if quantize else "fp32"
+            print(f"{variant} lot={batch_size:>3} : {results[(quantize, batch_size)]:.2f} morceaux/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du résumé local BART (morceaux par seconde).")
+    parser.add_argument("transcript", help="Fichier texte à découper et résumer")
+    parser.add_argument("-b", "--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--no-int8", action="store_true", help="Ne pas tester la variante quantifiée int8")
+    args = parser.parse_args()
+
+    from chunking import chunk_text
+
+    with open(args.transcript, "r", encoding="utf-8") as f:
+        text = f.read()
+    chunks = chunk_text(text, max_tokens=1000, count_tokens=token_counter())
+    print(f"{len(chunks)} morceaux à résumer")
+    benchmark_throughput(chunks, args.batch_sizes, (False,) if args.no_int8 else (False, True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Mesures du pipeline par étape et par segment.
+Chaque étape (découpage, transcription, résumé) enregistre sa durée, son facteur temps réel,
+le pic de mémoire (RSS) et les octets lus/écrits ; chaque segment sa durée ; chaque appel LLM
+ses tokens en entrée/sortie et sa latence.
+Les événements sont ajoutés au fil de l'eau à un fichier JSON lines (METRICS_FILE) et un
+résumé agrégé peut être écrit au format texte Prometheus (METRICS_PROM, ex: pour le
+textfile collector de node_exporter). METRICS_PROFILE=cprofile|py-spy profile chaque étape
+dans METRICS_PROFILE_DIR.
+Sans configuration, les mesures sont seulement gardées en mémoire (coût négligeable).
+listen() transmet en plus les événements d'un bloc à une fonction (ex: progression d'un job du démon).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de module resource, pic mémoire et E/S via psutil s'il est installé
+    resource = None
+
+PROFILERS = ["cprofile", "py-spy"]
+PREFIX = "resume_audio"
+
+_config = {
+    "jsonl": os.environ.get("METRICS_FILE") or None,
+    "prometheus": os.environ.get("METRICS_PROM") or None,
+    "profile": os.environ.get("METRICS_PROFILE") or None,
+    "profile_dir": os.environ.get("METRICS_PROFILE_DIR", "profiles"),
+}
+_lock = threading.Lock()
+# Un seul profil actif à la fois dans le processus (étapes imbriquées ou simultanées)
+_profiling = threading.Lock()
+_counters = {}
+_summaries = {}
+_gauges = {}
+_labels = ContextVar("metrics_labels", default={})
+_listeners = ContextVar("metrics_listeners", default=())
+
+
+def configure(jsonl: str | None = None, prometheus: str | None = None, profile: str | None = None,
+              profile_dir: str | None = None) -> None:
+    """Choisit les sorties (remplace les valeurs des variables d'environnement)."""
+    if profile is not None and profile not in PROFILERS:
+        raise ValueError(f"Profileur inconnu: {profile} (choix: {', '.join(PROFILERS)})")
+    for key, value in (("jsonl", jsonl), ("prometheus", prometheus), ("profile", profile),
+                       ("profile_dir", profile_dir)):
+        if value is not None:
+            _config[key] = value
+
+
+@contextmanager
+def labels(**extra):
+    """Étiquettes ajoutées à toutes les mesures du bloc (ex: job=...), y compris les étapes imbriquées."""
+    token = _labels.set({**_labels.get(), **extra})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+@contextmanager
+def listen(callback):
+    """
+    callback(événement) reçoit chaque événement émis dans le bloc (y compris depuis les threads
+    lancés avec asyncio.to_thread, qui héritent du contexte), même sans fichier METRICS_FILE.
+    """
+    token = _listeners.set(_listeners.get() + (callback,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+def _key(name: str, extra: dict) -> tuple:
+    return name, tuple(sorted({**_labels.get(), **extra}.items()))
+
+
+def _emit(event: dict) -> None:
+    listeners = _listeners.get()
+    if not _config["jsonl"] and not listeners:
+        return
+    event = {"time": round(time.time(), 3), **_labels.get(), **event}
+    for callback in listeners:
+        callback(event)
+    if not _config["jsonl"]:
+        return
+    line = json.dumps(event, ensure_ascii=False)
+    with _lock, open(_config["jsonl"], "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def inc(name: str, value: float = 1, **extra) -> None:
+    """Compteur cumulatif (octets, tokens, nombre de requêtes...)."""
+    with _lock:
+        key = _key(name, extra)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _summarize(name: str, value: float, extra: dict) -> None:
+    with _lock:
+        key = _key(name, extra)
+        total, count, peak = _summaries.get(key, (0.0, 0, value))
+        _summaries[key] = (total + value, count + 1, max(peak, value))
+
+
+def observe(name: str, value: float, details: dict | None = None, **extra) -> None:
+    """
+    Mesure ponctuelle (durée d'un segment, latence d'un appel...) : somme, nombre et maximum.
+    details (ex: numéro de segment) n'apparaît que dans l'événement JSON, pas dans les étiquettes agrégées.
+    """
+    _summarize(name, value, extra)
+    _emit({"metric": name, "value": round(value, 6), **extra, **(details or {})})
+
+
+def gauge(name: str, value: float, **extra) -> None:
+    """Dernière valeur connue (facteur temps réel, pic de mémoire...)."""
+    with _lock:
+        _gauges[_key(name, extra)] = value
+
+
+def _psutil_process():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process()
+
+
+def _peak_rss_bytes(children: bool = False) -> int | None:
+    """Pic de mémoire résidente du processus (ou de ses enfants terminés), None si indisponible."""
+    if resource is not None:
+        # ru_maxrss est en kilo-octets sous Linux et en octets sous macOS
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    process = _psutil_process()
+    if process is None or children:
+        return None
+    memory = process.memory_info()
+    # peak_wset : pic du working set sous Windows
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+def _io_bytes() -> tuple[int | None, int | None]:
+    """Octets lus et écrits par le processus (fichiers et pipes), d'après /proc/self/io si disponible."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_inblock * 512, usage.ru_oublock * 512
+    process = _psutil_process()
+    if process is None:
+        return None, None
+    counters = process.io_counters()
+    return counters.read_bytes, counters.write_bytes
+
+
+def _delta(after: int | None, before: int | None) -> int | None:
+    return None if after is None or before is None else after - before
+
+
+@contextmanager
+def _profiled(name: str):
+    """
+    Profile le bloc si le profilage est activé et qu'aucun autre profil n'est en cours : seule
+    l'étape la plus externe (ou la première de plusieurs étapes simultanées) est profilée, son
+    profil couvre les autres. cProfile n'accepte qu'un profileur actif par processus (3.12+).
+    """
+    profiler = _config["profile"]
+    if profiler is None or not _profiling.acquire(blocking=False):
+        yield
+        return
+    try:
+        with _profile_run(name, profiler):
+            yield
+    finally:
+        _profiling.release()
+
+
+@contextmanager
+def _profile_run(name: str, profiler: str):
+    os.makedirs(_config["profile_dir"], exist_ok=True)
+    base = os.path.join(_config["profile_dir"], f"{name}_{os.getpid()}_{int(time.time())}")
+    if profiler == "cprofile":
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(base + ".prof")
+        return
+    # py-spy échantillonne le processus (et ses sous-processus) de l'extérieur, sans le ralentir
+    process = subprocess.Popen(["py-spy", "record", "--pid", str(os.getpid()), "--subprocesses",
+                                "-o", base + ".svg"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        yield
+    finally:
+        process.send_signal(2)
+        process.wait()
+
+
+@contextmanager
+def stage(name: str, **extra):
+    """
+    Mesure une étape : durée, temps CPU, pic RSS (processus et enfants), octets lus/écrits.
+    Le pic RSS est celui du processus depuis son démarrage (ru_maxrss), pas celui de l'étape :
+    il n'est propre à une étape que dans un processus neuf (voir bench_pipeline).
+    Le bloc reçoit un dict où il peut renseigner audio_sec (durée audio traitée,
+    pour le facteur temps réel) et d'autres valeurs ajoutées à l'événement ;
+    en sortie du bloc, ce dict contient l'événement complet.
+    """
+    info = {}
+    read_before, written_before = _io_bytes()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    with _profiled(name):
+        try:
+            yield info
+        finally:
+            elapsed = time.perf_counter() - start
+            read_after, written_after = _io_bytes()
+            event = {
+                "stage": name,
+                "seconds": round(elapsed, 3),
+                "cpu_seconds": round(time.process_time() - cpu_before, 3),
+                "peak_rss_bytes": _peak_rss_bytes(),
+                "peak_rss_children_bytes": _peak_rss_bytes(children=True),
+                "bytes_read": _delta(read_after, read_before),
+                "bytes_written": _delta(written_after, written_before),
+                **extra, **info,
+            }
+            if info.get("audio_sec"):
+                event["real_time_factor"] = round(elapsed / info["audio_sec"], 4)
+                gauge("real_time_factor", event["real_time_factor"], stage=name, **extra)
+            inc("stage_seconds_total", elapsed, stage=name, **extra)
+            inc("stage_runs_total", 1, stage=name, **extra)
+            # Mesures indisponibles sur la plateforme (None) : pas de série Prometheus
+            for metric, field in (("bytes_read_total", "bytes_read"), ("bytes_written_total", "bytes_written")):
+                if event[field] is not None:
+                    inc(metric, event[field], stage=name, **extra)
+            for field in ("peak_rss_bytes", "peak_rss_children_bytes"):
+                if event[field] is not None:
+                    gauge(field, event[field])
+            info.update(event)
+            _emit(event)
+            if _config["prometheus"]:
+                write_prometheus(_config["prometheus"])
+
+
+def record_llm(model: str, tokens_in: int | None, tokens_out: int | None, latency_sec: float) -> None:
+    """Un appel LLM : tokens en entrée/sortie et latence de l'API."""
+    inc("llm_requests_total", 1, model=model)
+    inc("llm_tokens_total", tokens_in or 0, model=model, direction="in")
+    inc("llm_tokens_total", tokens_out or 0, model=model, direction="out")
+    _summarize("llm_latency_seconds", latency_sec, {"model": model})
+    _emit({"metric": "llm_request", "model": model, "tokens_in": tokens_in, "tokens_out": tokens_out,
+           "latency_seconds": round(latency_sec, 3)})
+
+
+def _format_labels(label_items: tuple) -> str:
+    if not label_items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in label_items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(label_items, escaped)) + "}"
+
+
+def prometheus_text() -> str:
+    """Toutes les mesures agrégées au format d'exposition texte de Prometheus."""
+    lines = []
+    with _lock:
+        for kind, series in (("counter", _counters), ("gauge", _gauges)):
+            for name in sorted({name for name, _ in series}):
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+                for (metric, label_items), value in sorted(series.items(), key=lambda item: str(item[0])):
+                    if metric == name:
+                        lines.append(f"{PREFIX}_{name}{_format_labels(label_items)} {value}")
+        summaries = sorted(_summaries.items(), key=lambda item: str(item[0]))
+        for name in sorted({name for name, _ in _summaries}):
+            lines.append(f"# TYPE {PREFIX}_{name} summary")
+            for (metric, label_items), (total, count, _) in summaries:
+                if metric == name:
+                    lines.append(f"{PREFIX}_{name}_sum{_format_labels(label_items)} {total}")
+                    lines.append(f"{PREFIX}_{name}_count{_format_labels(label_items)} {count}")
+            lines.append(f"# TYPE {PREFIX}_{name}_max gauge")
+            for (metric, label_items), (_, _, peak) in summaries:
+                if metric == name:
+                    lines.append(f"{PREFIX}_{name}_max{_format_labels(label_items)} {peak}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    """Écrit prometheus_text() de façon atomique (lisible à tout moment par un collecteur)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
+        _gauges.clear()
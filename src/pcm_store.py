@@ -0,0 +1,81 @@
+"""
+Intermédiaire PCM partagé entre le découpage et la transcription.
+Le découpage écrit l'audio de tous les segments, décodé une seule fois en 16 kHz mono, à la suite
+dans un seul fichier brut (audio_16k.pcm) ; la position de chaque segment est notée dans le
+manifeste de découpage (segments_manifest.json). La transcription lit des vues NumPy projetées en
+mémoire (np.memmap) sur ce fichier, sans copie ni décodage : l'export MP3 devient optionnel.
+"""
+
+import os
+
+import numpy as np
+
+PCM_NAME = "audio_16k.pcm"
+SAMPLE_RATE = 16000
+PCM_DTYPES = ["float32", "int16"]
+
+
+def append_segment(f, segment: np.ndarray, dtype: str = "float32") -> dict:
+    """
+    Ajoute un segment (float32 à 16 kHz) à la fin du fichier PCM ouvert `f` et le rend
+    lisible immédiatement. Retourne l'entrée d'index {"path", "offset", "length", "dtype"} ;
+    path est le nom du fichier PCM, relatif au dossier du manifeste (le fichier est écrit à côté),
+    pour que la lecture ne dépende pas du dossier courant.
+    """
+    if dtype not in PCM_DTYPES:
+        raise ValueError(f"Format PCM inconnu: {dtype} (choix: {', '.join(PCM_DTYPES)})")
+    offset = f.tell()
+    if dtype == "int16":
+        # Même échelle que la lecture (et que whisper.load_audio) : x 32768, écrêté à l'intervalle int16
+        data = np.clip(np.round(segment * 32768.0), -32768, 32767).astype("<i2")
+    else:
+        data = segment.astype("<f4", copy=False)
+    f.write(data.tobytes())
+    # Le segment peut être transcrit (pipeline) dès qu'il est produit
+    f.flush()
+    return {"path": os.path.basename(f.name), "offset": offset, "length": len(segment), "dtype": dtype}
+
+
+def segment_pcm(segment_path: str) -> dict | None:
+    """
+    Entrée d'index PCM d'un segment (d'après le manifeste de découpage), ou None.
+    Le chemin du fichier PCM est résolu par rapport au dossier du manifeste.
+    """
+    from Split import read_segment_info
+
+    info = read_segment_info(segment_path)
+    pcm = info.get("pcm") if info else None
+    if pcm is None:
+        return None
+    path = os.path.join(os.path.dirname(segment_path), pcm["path"])
+    if not os.path.isabs(pcm["path"]) and not os.path.exists(path) and os.path.exists(pcm["path"]):
+        # Manifestes plus anciens : chemin relatif au dossier courant du découpage
+        path = pcm["path"]
+    return {**pcm, "path": path}
+
+
+def open_segment(segment_path: str) -> np.ndarray | None:
+    """
+    Audio float32 16 kHz d'un segment lu dans le fichier PCM, ou None s'il n'y en a pas.
+    En float32, c'est une vue sans copie (copy-on-write : les modifications ne sont pas écrites) ;
+    en int16 seul le segment demandé est converti.
+    """
+    pcm = segment_pcm(segment_path)
+    if pcm is None or not os.path.exists(pcm["path"]):
+        return None
+    if pcm["length"] == 0:
+        return np.zeros(0, dtype=np.float32)
+    dtype = "<f4" if pcm["dtype"] == "float32" else "<i2"
+    view = np.memmap(pcm["path"], dtype=dtype, mode="c", offset=pcm["offset"], shape=(pcm["length"],))
+    if pcm["dtype"] == "int16":
+        return view.astype(np.float32) / 32768.0
+    return np.asarray(view)
+
+
+def segment_nbytes(segment_path: str) -> int | None:
+    """Taille en octets d'un segment dans le fichier PCM, si le fichier est complet pour ce segment."""
+    pcm = segment_pcm(segment_path)
+    if pcm is None or not os.path.exists(pcm["path"]):
+        return None
+    nbytes = pcm["length"] * np.dtype(pcm["dtype"]).itemsize
+    return nbytes if os.path.getsize(pcm["path"]) >= pcm["offset"] + nbytes else None
@@ -1,14 +1,14 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
 import json
 from pathlib import Path
-from openai import OpenAI
-# Imports lourds (whisper, split_audio) déplacés dans les fonctions pour accélérer le démarrage
+# Imports lourds (tkinter, openai, whisper, split_audio) déplacés dans les fonctions pour accélérer le démarrage
 
 
 def get_media_path():
     """Ouvre une fenêtre de sélection de fichier vidéo ou audio"""
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     root.attributes('-topmost', True)  # Garde la fenêtre au premier plan
@@ -36,45 +36,215 @@ def get_media_path():
     return None
 
 
-def split_audio_legacy(input_path, segment_duration_min=30):
+def split_audio_legacy(input_path, segment_duration_min=30, output_directory="segments_audio"):
     """Ancienne fonction, redirigée vers le module commun split_audio."""
     # Import différé pour accélérer le démarrage
     from Split import split_audio
-    return split_audio(input_path, segment_duration_min, output_directory="segments_audio")
-
-
-def transcribe_segments(segments_paths):
-    """Transcrit les segments audio avec Whisper"""
+    return split_audio(input_path, segment_duration_min, output_directory=output_directory)
+
+
+def split_audio_pipelined(input_path, segment_duration_min=30, max_pending=2, output_directory="segments_audio",
+                          scratch_directory=None, pcm=False, export_mp3=True):
+    """
+    Découpe l'audio dans un thread producteur et produit le chemin de chaque segment
+    dès qu'il est écrit : la transcription du segment 1 démarre pendant le découpage
+    des suivants. L'ordre des segments est conservé (file FIFO).
+    Avec pcm, la transcription lit l'audio 16 kHz écrit par le découpage sans le décoder
+    (export_mp3=False : aucun MP3 n'est produit).
+    """
+    import threading
+    from queue import Full, Queue
+    from Split import iter_split_audio
+
+    segments_queue = Queue(maxsize=max_pending)
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def put(item):
+        # put bloquant interruptible : si le consommateur s'arrête (exception, generator fermé),
+        # le producteur ne reste pas bloqué sur une file pleine
+        while not stop.is_set():
+            try:
+                segments_queue.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    def producer():
+        segments = iter_split_audio(input_path, segment_duration_min, output_directory=output_directory,
+                                    scratch_directory=scratch_directory, pcm=pcm, export_mp3=export_mp3)
+        try:
+            for path in segments:
+                if not put(path):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # Ferme le découpage (ffmpeg, fichiers temporaires) même en cas d'arrêt anticipé
+            segments.close()
+            put(done)
+
+    thread = threading.Thread(target=producer, name="split-producer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            path = segments_queue.get()
+            if path is done:
+                break
+            yield path
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def _skip_completed(segments_paths, manifest, transcribe_iter):
+    """
+    Produit (index, chemin, résultat) dans l'ordre des segments : les segments déjà transcrits
+    d'après le manifeste sont relus (résultat sans "segments"), seuls les autres passent
+    par transcribe_iter.
+    """
+    from collections import deque
+    import job_manifest
+
+    order = deque()
+
+    def todo_paths():
+        for i, audio_path in enumerate(segments_paths, 1):
+            text = job_manifest.transcribed_text(manifest, i) if manifest is not None else None
+            order.append((i, audio_path, text))
+            if text is None:
+                yield audio_path
+
+    def resumed(entry):
+        i, audio_path, text = entry
+        return i, audio_path, {"text": text, "segments": None}
+
+    for result in transcribe_iter(todo_paths()):
+        while order[0][2] is not None:
+            yield resumed(order.popleft())
+        i, audio_path, _ = order.popleft()
+        yield i, audio_path, result
+    while order:
+        yield resumed(order.popleft())
+
+
+def transcribe_segments(segments_paths, model_size="base", processes=1, threads_per_process=None, use_cache=True,
+                        manifest=None, output_directory="transcriptions", executor=None, backend=None,
+                        batch_size=1):
+    """
+    Transcrit les segments audio avec Whisper.
+    segments_paths peut être une liste ou un itérable (ex: split_audio_pipelined),
+    consommé au fur et à mesure que les segments sont disponibles.
+    Avec processes > 1, les segments sont répartis sur plusieurs processus CPU
+    (threads_per_process threads torch chacun), résultats rendus dans l'ordre.
+    Avec use_cache, un segment déjà transcrit (même audio, même modèle) est relu du cache.
+    Avec un manifeste de job (job_manifest), les segments déjà transcrits lors d'une
+    exécution précédente sont repris tels quels.
+    En plus des .txt, chaque segment produit transcription_XX.jsonl (horodatages absolus
+    d'après le manifeste de découpage) et transcription.jsonl regroupe tout, au fil de l'eau.
+    executor permet de réutiliser un pool de transcription (transcribe_pool.make_executor).
+    backend choisit le moteur de transcription (asr_backends, défaut : variable ASR_BACKEND).
+    Avec batch_size > 1 (un seul processus), les fenêtres de 30 s de plusieurs segments sont
+    décodées par lots (batched_transcribe).
+    """
     print("\n=== ÉTAPE 2: TRANSCRIPTION ===")
     
     # Import différé pour accélérer le démarrage
-    import warnings
-    # Supprimer l'avertissement FP16 sur CPU (Whisper utilise automatiquement FP32)
-    warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
-    
-    import whisper
+    import time
     from tqdm import tqdm
+    import job_manifest
+    import metrics
+    import transcript_format
+    import whisper_models
+    from Split import read_segment_info
 
-    output_directory = "transcriptions"
     os.makedirs(output_directory, exist_ok=True)
 
-    print("Chargement du modèle Whisper...")
-    model = whisper.load_model("base")
+    if processes > 1 or executor is not None:
+        from transcribe_pool import iter_transcribe_parallel
+
+        print("Transcription dans un pool de processus...")
+
+        def transcribe_iter(paths):
+            return iter_transcribe_parallel(paths, model_size, processes, threads_per_process, use_cache=use_cache,
+                                            executor=executor, with_segments=True, backend=backend)
+    elif batch_size > 1:
+        from batched_transcribe import iter_transcribe_batched
+
+        print("Chargement du modèle Whisper...")
+        model = whisper_models.get_model(model_size, backend=backend)
+
+        def transcribe_iter(paths):
+            return iter_transcribe_batched(model, paths, batch_size, "fr", use_cache=use_cache, model_size=model_size)
+    else:
+        from asr_backends import load_audio
+        from transcription_cache import transcribe_cached
+
+        print("Chargement du modèle Whisper...")
+        model = whisper_models.get_model(model_size, backend=backend)
+
+        def transcribe_iter(paths):
+            for audio_path in paths:
+                if use_cache:
+                    yield transcribe_cached(model, audio_path, model_size, "fr")
+                else:
+                    yield model.transcribe(load_audio(audio_path), language="fr")
     transcriptions = []
+    last_end = 0.0
 
     # Barre de progression pour la transcription
-    with tqdm(total=len(segments_paths), desc="Transcription", unit="segment") as pbar:
-        for i, audio_path in enumerate(segments_paths, 1):
-            pbar.set_description(f"Transcription du segment {i}/{len(segments_paths)}")
-            result = model.transcribe(audio_path, language="fr")
+    total = len(segments_paths) if hasattr(segments_paths, "__len__") else None
+    combined_path = os.path.join(output_directory, transcript_format.COMBINED_NAME)
+    with metrics.stage("transcription", model=model_size) as stage_info, \
+            tqdm(total=total, desc="Transcription", unit="segment") as pbar, \
+            open(combined_path, "w", encoding="utf-8") as combined:
+        audio_sec = 0.0
+        segment_start = time.perf_counter()
+        for i, audio_path, result in _skip_completed(segments_paths, manifest, transcribe_iter):
+            pbar.set_description(f"Transcription du segment {i}/{total or '?'}")
+            text = result["text"]
+
+            # Durée depuis le segment précédent (en parallèle ou en pipeline : débit observé)
+            info = read_segment_info(audio_path)
+            segment_sec = time.perf_counter() - segment_start
+            details = {"segment": i, "resumed": result["segments"] is None}
+            if info is not None:
+                duration = (info["end_sample"] - info["start_sample"]
+                            - info.get("removed_silence_samples", 0)) / info["sample_rate"]
+                audio_sec += duration
+                details["real_time_factor"] = round(segment_sec / duration, 4) if duration else None
+            metrics.observe("segment_seconds", segment_sec, details, stage="transcription")
+
+            # Transcription horodatée du segment (relue si le segment est repris d'un run précédent)
+            jsonl_path = os.path.join(output_directory, f"transcription_{i:02d}.jsonl")
+            if result["segments"] is not None:
+                records = transcript_format.timed_records(i, result["segments"], info, fallback_offset=last_end)
+                transcript_format.write_jsonl(jsonl_path, records)
+            elif os.path.exists(jsonl_path):
+                records = list(transcript_format.read_jsonl(jsonl_path))
+            else:
+                records = []
+            for record in records:
+                combined.write(json.dumps(record, ensure_ascii=False) + "\n")
+            combined.flush()
+            if records:
+                last_end = records[-1]["end"]
 
             # Sauvegarder la transcription individuelle
             output_path = os.path.join(output_directory, f"transcription_{i:02d}.txt")
             with open(output_path, "w", encoding="utf-8") as f:
-                f.write(result["text"])
+                f.write(text)
+            if manifest is not None:
+                job_manifest.record_transcription(manifest, i, output_path, text)
 
-            transcriptions.append(result["text"])
+            transcriptions.append(text)
             pbar.update(1)
+            segment_start = time.perf_counter()
+        stage_info.update(audio_sec=round(audio_sec, 3), segments=len(transcriptions))
 
     # Sauvegarder toutes les transcriptions dans un seul fichier
     full_transcript_path = os.path.join(output_directory, "transcription_complete.txt")
@@ -112,42 +282,46 @@ def load_api_key():
     return api_key
 
 
-def summarize_transcriptions(transcriptions):
-    """Résume les transcriptions avec GPT"""
+def summarize_transcriptions(transcriptions, output_directory="resumes", api_key=None, dedupe=True):
+    """
+    Résume les transcriptions avec GPT (map-reduce sur les segments).
+    Avec dedupe, les boucles de répétition et les recouvrements aux jonctions des segments
+    sont retirés avant le découpage en blocs (moins de tokens envoyés au modèle).
+    La variable d'environnement OPENAI_BASE_URL permet de viser un serveur compatible local.
+    Sans api_key, la clé est lue dans config.json (ou demandée à l'utilisateur).
+    """
     print("\n=== ÉTAPE 3: RÉSUMÉ ===")
     
     from tqdm import tqdm
+    import metrics
+    from chunking import chunk_text
+    from dedupe import clean_transcriptions, report
+    from summarizer import summarize_map_reduce
 
     # Charger la clé API
-    client = OpenAI(api_key=load_api_key())
+    api_key = api_key or load_api_key()
 
-    output_directory = "resumes"
     os.makedirs(output_directory, exist_ok=True)
 
-    # Concaténer toutes les transcriptions
-    full_text = "\n\n".join(transcriptions)
-
-    # Barre de progression pour la génération du résumé
-    with tqdm(desc="Génération du résumé avec GPT", unit="opération") as pbar:
-        pbar.set_description("Création du résumé global...")
-        response = client.chat.completions.create(
-            model="gpt-5",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Tu es un assistant expert qui résume des transcriptions audio/vidéo. "
-                        "Fournis un résumé clair, structuré et concis du contenu suivant.\n\n"
-                        f"{full_text}"
-                    ),
-                },
-            ],
-        )
+    if dedupe:
+        with metrics.stage("dedupe") as stage_info:
+            transcriptions, stats = clean_transcriptions(transcriptions)
+            stage_info.update(stats)
+        metrics.inc("dedupe_tokens_removed_total", stats["loop_tokens_removed"], kind="loop")
+        metrics.inc("dedupe_tokens_removed_total", stats["seam_tokens_removed"], kind="seam")
+        print(report(stats))
+
+    # Regrouper les transcriptions en blocs alignés sur les phrases, mesurés en tokens
+    chunks = chunk_text("\n\n".join(transcriptions), max_tokens=8000)
+
+    # Résumé map-reduce : chaque bloc est résumé en parallèle,
+    # puis les résumés partiels sont combinés en un résumé global
+    with metrics.stage("summary", model="gpt-5") as stage_info, \
+            tqdm(desc="Génération du résumé avec GPT", unit="opération") as pbar:
+        stage_info["chunks"] = len(chunks)
+        pbar.set_description(f"Création du résumé global ({len(chunks)} blocs)...")
+        global_summary = summarize_map_reduce(chunks, api_key, model="gpt-5")
         pbar.update(1)
-        pbar.set_description("Récupération de la réponse...")
-        global_summary = response.choices[0].message.content
-        pbar.update(1)
-
 
     # Sauvegarder le résumé global
     with open(
@@ -170,25 +344,51 @@ def main():
         print("❌ Aucun fichier sélectionné.")
         return
 
-    try:
-        # Découpage audio
-        print("\n=== ÉTAPE 1: DÉCOUPAGE ===")
-        segments_paths = split_audio_legacy(input_path)
-
-        # Transcription
-        transcriptions = transcribe_segments(segments_paths)
-
-        # Résumé
-        summarize_transcriptions(transcriptions)
+    import job_manifest
+    from workspace import WorkspaceBusy, job_id_for, job_workspace
 
-        print("\n✅ Traitement terminé avec succès!")
-        print("📂 Vous trouverez les fichiers dans les dossiers:")
-        print(f"   - Audio: {os.path.abspath('segments_audio')}")
-        print(f"   - Transcriptions: {os.path.abspath('transcriptions')}")
-        print(f"   - Résumés: {os.path.abspath('resumes')}")
-
-    except Exception as e:
-        print(f"\n❌ Une erreur s'est produite: {str(e)}")
+    try:
+        # Espace de travail propre au fichier : plusieurs traitements peuvent tourner en parallèle
+        with job_workspace(job_id_for(input_path)) as ws:
+            # Manifeste du job : une relance après une erreur reprend à la première unité manquante
+            manifest = job_manifest.load(input_path, job_manifest.pipeline_params(30), path=ws["manifest"])
+
+            try:
+                # Découpage et transcription en pipeline : chaque segment est transcrit
+                # dès qu'il est écrit, pendant que les suivants sont découpés
+                print("\n=== ÉTAPE 1: DÉCOUPAGE ===")
+                segments_paths = job_manifest.completed_segments(manifest)
+                if segments_paths is not None:
+                    print(f"⏩ Découpage déjà effectué ({len(segments_paths)} segments), reprise du job")
+                else:
+                    segments_paths = job_manifest.record_segments(manifest, split_audio_pipelined(
+                        input_path, output_directory=ws["segments"], scratch_directory=ws["scratch"]
+                    ))
+
+                # Transcription
+                transcriptions = transcribe_segments(segments_paths, manifest=manifest,
+                                                     output_directory=ws["transcriptions"])
+
+                # Résumé
+                if job_manifest.summary_done(manifest):
+                    print("\n⏩ Résumé déjà généré, reprise du job")
+                else:
+                    summarize_transcriptions(transcriptions, output_directory=ws["resumes"])
+                    job_manifest.record_summary(manifest, os.path.join(ws["resumes"], "resume_global.txt"))
+
+                print("\n✅ Traitement terminé avec succès!")
+                print("📂 Vous trouverez les fichiers dans les dossiers:")
+                print(f"   - Audio: {os.path.abspath(ws['segments'])}")
+                print(f"   - Transcriptions: {os.path.abspath(ws['transcriptions'])}")
+                print(f"   - Résumés: {os.path.abspath(ws['resumes'])}")
+
+            except Exception as e:
+                print(f"\n❌ Une erreur s'est produite: {str(e)}")
+                print(f"↩️  Relancez le traitement sur le même fichier pour reprendre là où il s'est arrêté "
+                      f"({ws['manifest']})")
+    except WorkspaceBusy as e:
+        # Le même fichier est déjà traité par une autre fenêtre ou un autre job
+        print(f"\n❌ {e}")
 
     input("\nAppuyez sur Entrée pour fermer...")
 
@@ -1,12 +1,12 @@
 import os
+import sys
 from process_gloabl import load_api_key, summarize_transcriptions
 
 
-def read_transcriptions():
+def read_transcriptions(transcriptions_dir="transcriptions"):
     """Lit les transcriptions depuis le dossier transcriptions"""
-    transcriptions_dir = "transcriptions"
     if not os.path.exists(transcriptions_dir):
-        print("❌ Le dossier 'transcriptions' n'existe pas!")
+        print(f"❌ Le dossier '{transcriptions_dir}' n'existe pas!")
         return None
     
     # Lire le fichier de transcription complète s'il existe
@@ -26,18 +26,22 @@ def read_transcriptions():
 
 
 def main():
+    # Dossier d'un job (ex: jobs/<nom>_<empreinte>) en argument, sinon le dossier courant
+    job_directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    resumes_dir = os.path.join(job_directory, "resumes")
+
     # Lire les transcriptions
-    transcriptions = read_transcriptions()
+    transcriptions = read_transcriptions(os.path.join(job_directory, "transcriptions"))
     if not transcriptions:
         print("❌ Aucune transcription trouvée!")
         return
     
     try:
         # Générer le résumé en utilisant la fonction de process_gloabl
-        summarize_transcriptions(transcriptions)
+        summarize_transcriptions(transcriptions, output_directory=resumes_dir)
         
         print("\n✅ Résumé terminé avec succès!")
-        print(f"📂 Le résumé se trouve dans: {os.path.abspath('resumes')}")
+        print(f"📂 Le résumé se trouve dans: {os.path.abspath(resumes_dir)}")
         
     except Exception as e:
         print(f"\n❌ Une erreur s'est produite: {str(e)}")
@@ -0,0 +1,109 @@
+"""
+Résumé map-reduce des transcriptions.
+Chaque segment est résumé en parallèle (asyncio, sémaphore borné, client HTTP réutilisé),
+puis les résumés partiels sont combinés par groupes de `fan_in` jusqu'à un résumé global :
+la latence dépend de la profondeur de l'arbre et non du nombre de segments.
+Le client OpenAI accepte un base_url, ce qui permet de viser un serveur local compatible.
+Les réponses passent par le cache disque llm_cache (relances des erreurs temporaires comprises).
+"""
+
+import asyncio
+import time
+
+MAP_PROMPT = (
+    "Tu es un assistant qui résume des transcriptions audio/vidéo. "
+    "Résume ce passage en français de manière concise et structurée, "
+    "sans perdre les informations importantes."
+)
+REDUCE_PROMPT = (
+    "Tu es un assistant qui combine des résumés partiels d'une même transcription. "
+    "Fusionne les résumés suivants, dans l'ordre, en un seul résumé cohérent et sans répétitions."
+)
+GLOBAL_PROMPT = (
+    "Tu es un assistant expert qui résume des transcriptions audio/vidéo. "
+    "Fournis un résumé clair, structuré et concis du contenu suivant."
+)
+
+
+async def map_chunks(chunks: list[str], complete, concurrency: int = 8, prompt: str = MAP_PROMPT) -> list[str]:
+    """Map : résume chaque morceau, au plus `concurrency` requêtes simultanées. L'ordre est conservé."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(text):
+        async with semaphore:
+            return await complete(prompt, text)
+
+    return list(await asyncio.gather(*(run(chunk) for chunk in chunks)))
+
+
+async def reduce_summaries(summaries: list[str], complete, concurrency: int = 8, fan_in: int = 8) -> str:
+    """Reduce : combine les résumés par groupes de `fan_in`, un niveau de l'arbre à la fois."""
+    level = summaries
+    while len(level) > fan_in:
+        groups = ["\n\n".join(level[i:i + fan_in]) for i in range(0, len(level), fan_in)]
+        level = await map_chunks(groups, complete, concurrency, REDUCE_PROMPT)
+    return await complete(GLOBAL_PROMPT, "\n\n".join(level))
+
+
+async def map_reduce(chunks: list[str], complete, concurrency: int = 8, fan_in: int = 8) -> str:
+    """
+    Résume `chunks` en map-reduce hiérarchique.
+    complete(system_prompt, text) est une coroutine qui retourne le texte généré.
+    """
+    if not chunks:
+        return ""
+    if len(chunks) == 1:
+        return await complete(GLOBAL_PROMPT, chunks[0])
+    summaries = await map_chunks(chunks, complete, concurrency)
+    return await reduce_summaries(summaries, complete, concurrency, fan_in)
+
+
+def openai_complete(client, model: str = "gpt-5", cache: bool = True):
+    """
+    Fonction `complete` basée sur un client AsyncOpenAI partagé par toutes les requêtes.
+    Les tokens et la latence de chaque appel sont enregistrés (metrics.record_llm).
+    Avec cache, les réponses sont lues/écrites dans llm_cache (clé : serveur, modèle, prompt, texte).
+    """
+    import llm_cache
+    import metrics
+
+    async def complete(prompt, text):
+        start = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text},
+            ],
+        )
+        usage = getattr(response, "usage", None)
+        metrics.record_llm(model, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+                           time.perf_counter() - start)
+        return response.choices[0].message.content
+
+    if cache:
+        return llm_cache.cached_complete(complete, f"openai@{client.base_url}", model)
+    return complete
+
+
+def sync_complete(summarize_func):
+    """Adapte une fonction de résumé synchrone summarize_func(text) (exécutée dans un thread)."""
+
+    async def complete(prompt, text):
+        return await asyncio.to_thread(summarize_func, text)
+
+    return complete
+
+
+async def _summarize_openai(chunks, api_key, base_url, model, concurrency, fan_in, cache):
+    from openai import AsyncOpenAI
+
+    # Avec le cache, les relances sont faites par llm_cache (Retry-After respecté)
+    async with AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0 if cache else 2) as client:
+        return await map_reduce(chunks, openai_complete(client, model, cache), concurrency, fan_in)
+
+
+def summarize_map_reduce(chunks: list[str], api_key: str, base_url: str | None = None, model: str = "gpt-5",
+                         concurrency: int = 8, fan_in: int = 8, cache: bool = True) -> str:
+    """Point d'entrée synchrone : résumé map-reduce via l'API OpenAI (ou un serveur compatible)."""
+    return asyncio.run(_summarize_openai(chunks, api_key, base_url, model, concurrency, fan_in, cache))
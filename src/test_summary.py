@@ -1,12 +1,26 @@
 import os
+import re
 import json
+import asyncio
 from pathlib import Path
-from openai import OpenAI
-import anthropic
-from transformers import pipeline
-from mistralai.client import MistralClient
-from google.cloud import aiplatform
-from vertexai.language_models import TextGenerationModel
+# Les SDK des fournisseurs (openai, anthropic, transformers, mistralai, vertexai) sont
+# importés uniquement quand le fournisseur correspondant est choisi (voir PROVIDERS)
+
+PROVIDERS = {}
+
+# Les réponses des API distantes passent par le cache disque llm_cache (clé : fournisseur,
+# modèle, prompt et texte) : relancer le test sur une transcription inchangée ne rappelle pas l'API
+SYSTEM_PROMPT = "Tu es un assistant qui résume des transcriptions."
+SUMMARY_PROMPT = "Résume ce texte en français de manière concise et structurée:"
+MISTRAL_PROMPT = "Résume ce texte en français de manière structurée:"
+
+
+def register_provider(choice, label):
+    """Enregistre une fabrique de fonction de résumé pour un choix du menu."""
+    def decorator(factory):
+        PROVIDERS[choice] = (label, factory)
+        return factory
+    return decorator
 
 
 def load_api_key():
@@ -33,93 +47,104 @@ def load_api_key():
 def get_model_choice():
     """Permet à l'utilisateur de choisir le modèle"""
     print("\nChoisissez le modèle à utiliser:")
-    print("1. GPT-3.5-turbo (OpenAI - payant mais rapide)")
-    print("2. Claude-2 (Anthropic - alternative à GPT)")
-    print("3. BART (Hugging Face - gratuit, local)")
-    print("4. GPT-3.5-turbo-16k (OpenAI - plus de contexte)")
-    print("5. Mistral Large (Français, très performant)")
-    print("6. Google PaLM 2 (Via Vertex AI)")
-    
-    choice = input("\nVotre choix (1-6): ").strip()
+    for key in sorted(PROVIDERS):
+        print(f"{key}. {PROVIDERS[key][0]}")
+    
+    choice = input(f"\nVotre choix ({min(PROVIDERS)}-{max(PROVIDERS)}): ").strip()
     return choice
 
 
 def summarize_with_openai(text, client, model="gpt-3.5-turbo"):
-    """Résumé avec OpenAI"""
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": "Tu es un assistant qui résume des transcriptions."
-            },
-            {
-                "role": "user",
-                "content": f"Résume ce texte en français de manière concise et structurée:\n\n{text}"
-            }
-        ]
-    )
-    return response.choices[0].message.content
+    """Résumé avec OpenAI (mis en cache)"""
+    import llm_cache
+
+    def call():
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"{SUMMARY_PROMPT}\n\n{text}"
+                }
+            ]
+        )
+        return response.choices[0].message.content
+
+    return llm_cache.cached("openai", model, f"{SYSTEM_PROMPT}\n{SUMMARY_PROMPT}", text, call)
 
 
 def summarize_with_claude(text, client):
-    """Résumé avec Claude"""
-    response = client.messages.create(
-        model="claude-2",
-        max_tokens=1000,
-        messages=[
-            {
-                "role": "user",
-                "content": f"Résume ce texte en français de manière concise et structurée:\n\n{text}"
-            }
-        ]
-    )
-    return response.content
+    """Résumé avec Claude (mis en cache)"""
+    import llm_cache
+
+    model = "claude-2"
+
+    def call():
+        response = client.messages.create(
+            model=model,
+            max_tokens=1000,
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"{SUMMARY_PROMPT}\n\n{text}"
+                }
+            ]
+        )
+        # Texte des blocs de la réponse (seul du texte peut être mis en cache)
+        return "".join(getattr(block, "text", "") for block in response.content)
+
+    return llm_cache.cached("anthropic", model, SUMMARY_PROMPT, text, call)
 
 
 def summarize_with_bart(text):
-    """Résumé avec BART"""
-    summarizer = pipeline(
-        "summarization",
-        model="facebook/bart-large-cnn",
-        tokenizer="facebook/bart-large-cnn"
-    )
-    
-    # BART a une limite de tokens, donc on découpe si nécessaire
-    max_chunk_length = 1024
-    chunks = [text[i:i + max_chunk_length] for i in range(0, len(text), max_chunk_length)]
-    
-    summaries = []
-    for chunk in chunks:
-        summary = summarizer(chunk, max_length=130, min_length=30, do_sample=False)
-        summaries.append(summary[0]['summary_text'])
-    
+    """Résumé avec BART (pipeline chargé une seule fois, morceaux traités par lots)"""
+    from chunking import chunk_text
+    from local_summarizer import summarize_chunks, token_counter
+
+    # BART a une limite de 1024 tokens : découpage en phrases mesurées avec son tokenizer
+    chunks = chunk_text(text, max_tokens=1000, count_tokens=token_counter())  # marge pour les tokens spéciaux
+    summaries = summarize_chunks(chunks, batch_size=8)
     return " ".join(summaries)
 
 
 def summarize_with_mistral(text, api_key):
-    """Résumé avec Mistral AI"""
-    client = MistralClient(api_key=api_key)
-    
-    response = client.chat(
-        model="mistral-large-latest",
-        messages=[
-            {
-                "role": "system",
-                "content": "Tu es un assistant qui résume des transcriptions."
-            },
-            {
-                "role": "user",
-                "content": "Résume ce texte en français de manière structurée:"
-                          f"\n\n{text}"
-            }
-        ]
-    )
-    return response.messages[0].content
+    """Résumé avec Mistral AI (mis en cache)"""
+    import llm_cache
+
+    model = "mistral-large-latest"
+
+    def call():
+        from mistralai.client import MistralClient
+
+        client = MistralClient(api_key=api_key, max_retries=0)
+
+        response = client.chat(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"{MISTRAL_PROMPT}\n\n{text}"
+                }
+            ]
+        )
+        return response.messages[0].content
+
+    return llm_cache.cached("mistral", model, f"{SYSTEM_PROMPT}\n{MISTRAL_PROMPT}", text, call)
 
 
 def summarize_with_google(text):
     """Résumé avec Google PaLM"""
+    from google.cloud import aiplatform
+    from vertexai.language_models import TextGenerationModel
+
     aiplatform.init(project="votre-projet")
     model = TextGenerationModel.from_pretrained("text-bison@001")
     
@@ -157,6 +182,64 @@ def load_mistral_key():
     return api_key
 
 
+def load_anthropic_key():
+    """Charge la clé API Anthropic"""
+    config_file = Path("config.json")
+    
+    config = {}
+    if config_file.exists():
+        with open(config_file, "r") as f:
+            config = json.load(f)
+            api_key = config.get("ANTHROPIC_API_KEY", "")
+            if api_key:
+                return api_key
+    
+    api_key = input("Entrez votre clé API Anthropic: ").strip()
+    
+    # Mettre à jour le fichier config
+    config["ANTHROPIC_API_KEY"] = api_key
+    with open(config_file, "w") as f:
+        json.dump(config, f)
+    
+    return api_key
+
+
+@register_provider("1", "GPT-3.5-turbo (OpenAI - payant mais rapide)")
+@register_provider("4", "GPT-3.5-turbo-16k (OpenAI - plus de contexte)")
+def openai_provider():
+    from openai import OpenAI
+
+    # Les relances sont faites par llm_cache (Retry-After respecté), pas par le SDK
+    client = OpenAI(api_key=load_api_key(), max_retries=0)
+    model = "gpt-4o"
+    return lambda text: summarize_with_openai(text, client, model)
+
+
+@register_provider("2", "Claude-2 (Anthropic - alternative à GPT)")
+def claude_provider():
+    import anthropic
+
+    # Les relances sont faites par llm_cache (Retry-After respecté), pas par le SDK
+    client = anthropic.Anthropic(api_key=load_anthropic_key(), max_retries=0)
+    return lambda text: summarize_with_claude(text, client)
+
+
+@register_provider("3", "BART (Hugging Face - gratuit, local)")
+def bart_provider():
+    return summarize_with_bart
+
+
+@register_provider("5", "Mistral Large (Français, très performant)")
+def mistral_provider():
+    api_key = load_mistral_key()
+    return lambda text: summarize_with_mistral(text, api_key)
+
+
+@register_provider("6", "Google PaLM 2 (Via Vertex AI)")
+def google_provider():
+    return summarize_with_google
+
+
 def test_summary():
     """Test la partie résumé avec différents modèles"""
     print("=== TEST DU RÉSUMÉ ===")
@@ -170,53 +253,43 @@ def test_summary():
     # Choix du modèle
     choice = get_model_choice()
     
-    # Configuration selon le choix
-    if choice in ['1', '4']:
-        client = OpenAI(api_key=load_api_key())
-        model = "gpt-4o"
-        summarize_func = lambda text: summarize_with_openai(text, client, model)
-    elif choice == '2':
-        client = anthropic.Anthropic(api_key=load_anthropic_key())
-        summarize_func = lambda text: summarize_with_claude(text, client)
-    elif choice == '5':
-        api_key = load_mistral_key()
-        summarize_func = lambda text: summarize_with_mistral(text, api_key)
-    elif choice == '6':
-        summarize_func = summarize_with_google
-    else:
-        summarize_func = summarize_with_bart
+    # Configuration selon le choix (BART par défaut) : seul le SDK choisi est importé
+    _, factory = PROVIDERS.get(choice, PROVIDERS["3"])
+    summarize_func = factory()
     
     # Lire la transcription
     with open(transcript_path, "r", encoding="utf-8") as f:
         full_text = f.read()
     
-    # Diviser en segments
-    segments = full_text.split("="*50)
-    segments = [s.strip() for s in segments if s.strip()]
+    # Retirer les en-têtes de segments puis découper en blocs mesurés en tokens
+    from chunking import chunk_text
+
+    full_text = re.sub(r"={50}\s*SEGMENT \d+\s*={50}", "\n", full_text)
+    segments = chunk_text(full_text, max_tokens=4000)
     
     # Créer le dossier des résumés
     output_directory = "resumes"
     os.makedirs(output_directory, exist_ok=True)
     
     try:
-        # Résumer chaque segment
-        summaries = []
-        for i, text in enumerate(segments, 1):
-            print(f"\nRésumé du segment {i}...")
-            
-            summary = summarize_func(text)
-            
+        from summarizer import map_chunks, reduce_summaries, sync_complete
+
+        complete = sync_complete(summarize_func)
+
+        # Résumer tous les segments en parallèle (requêtes simultanées bornées)
+        print(f"\nRésumé de {len(segments)} segments...")
+        # BART tourne en local : un seul appel à la fois, le parallélisme vient des lots
+        concurrency = 1 if summarize_func is summarize_with_bart else 4
+        summaries = asyncio.run(map_chunks(segments, complete, concurrency=concurrency))
+        for i, summary in enumerate(summaries, 1):
             output_path = os.path.join(output_directory, f"resume_{i:02d}.txt")
             with open(output_path, "w", encoding="utf-8") as f:
                 f.write(summary)
-            
-            summaries.append(summary)
             print(f"✅ Segment {i} résumé")
         
-        # Résumé global
+        # Résumé global (combinaison hiérarchique des résumés)
         print("\nCréation du résumé global...")
-        all_text = "\n\n".join(summaries)
-        global_summary = summarize_func(all_text)
+        global_summary = asyncio.run(reduce_summaries(summaries, complete, concurrency=concurrency))
         
         with open(os.path.join(output_directory, "resume_global.txt"), "w", 
                   encoding="utf-8") as f:
@@ -0,0 +1,157 @@
+"""
+Transcription parallèle des segments sur CPU.
+Les segments sont répartis sur N processus, chacun avec son propre modèle Whisper
+(moteur au choix, voir asr_backends) et un nombre fixé de threads de calcul ;
+les résultats sont rendus dans l'ordre des segments.
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+_worker_model = None
+
+
+def _init_worker(model_size: str, threads: int, backend: str | None = None) -> None:
+    """Initialise un processus : nombre de threads puis chargement du modèle (une fois)."""
+    global _worker_model
+    import asr_backends
+    import whisper_models
+
+    backend = backend or asr_backends.DEFAULT_BACKEND
+    # Lu par CTranslate2 (faster-whisper) au chargement du modèle
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    if asr_backends.uses_torch(backend):
+        import torch
+
+        torch.set_num_threads(threads)
+    _worker_model = whisper_models.get_model(model_size, device="cpu", backend=backend)
+
+
+def _transcribe_one(audio_path: str, model_size: str, language: str, use_cache: bool) -> dict:
+    if use_cache:
+        from transcription_cache import transcribe_cached
+
+        result = transcribe_cached(_worker_model, audio_path, model_size, language)
+    else:
+        from asr_backends import load_audio
+
+        result = _worker_model.transcribe(load_audio(audio_path), language=language)
+    return {"text": result["text"], "segments": result.get("segments", [])}
+
+
+def default_layout(processes: int | None = None, threads_per_process: int | None = None) -> tuple[int, int]:
+    """
+    Répartit les cœurs entre processus et threads par processus.
+    Si un seul des deux est donné, l'autre est déduit du nombre de cœurs.
+    """
+    cores = os.cpu_count() or 1
+    if processes and threads_per_process:
+        return processes, threads_per_process
+    if processes:
+        return processes, max(1, cores // processes)
+    if threads_per_process:
+        return max(1, cores // threads_per_process), threads_per_process
+    # Par défaut : 4 threads par processus, compromis raisonnable pour Whisper sur CPU
+    threads = min(4, cores)
+    return max(1, cores // threads), threads
+
+
+def make_executor(model_size: str = "base", processes: int | None = None,
+                  threads_per_process: int | None = None, backend: str | None = None) -> ProcessPoolExecutor:
+    """
+    Crée un pool de processus dont chaque worker a chargé le modèle (réutilisable entre fichiers).
+    Les workers sont lancés en spawn : le pool est alimenté pendant que d'autres threads tournent
+    (découpage en pipeline, lots), et un fork copierait les verrous qu'ils détiennent.
+    """
+    processes, threads = default_layout(processes, threads_per_process)
+    return ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"), initializer=_init_worker,
+                               initargs=(model_size, threads, backend))
+
+
+def iter_transcribe_parallel(segments_paths, model_size: str = "base", processes: int | None = None,
+                             threads_per_process: int | None = None, language: str = "fr",
+                             use_cache: bool = False, executor: ProcessPoolExecutor | None = None,
+                             with_segments: bool = False, backend: str | None = None):
+    """
+    Transcrit les segments dans un pool de processus et produit les textes dans l'ordre.
+    segments_paths peut être un itérable alimenté au fil de l'eau (découpage en pipeline) :
+    chaque segment est soumis dès qu'il arrive.
+    use_cache active le cache disque des transcriptions (voir transcription_cache).
+    Un pool existant (make_executor) peut être fourni pour garder les modèles chargés
+    d'un appel à l'autre ; il n'est alors pas fermé.
+    Avec with_segments, chaque résultat est {"text", "segments"} (segments horodatés de Whisper).
+    backend n'est utilisé que pour créer le pool (un pool fourni garde son moteur).
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = make_executor(model_size, processes, threads_per_process, backend)
+    pending = deque()
+    try:
+        for audio_path in segments_paths:
+            pending.append(executor.submit(_transcribe_one, audio_path, model_size, language, use_cache))
+            while pending and pending[0].done():
+                result = pending.popleft().result()
+                yield result if with_segments else result["text"]
+        while pending:
+            result = pending.popleft().result()
+            yield result if with_segments else result["text"]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def transcribe_parallel(segments_paths, model_size: str = "base", processes: int | None = None,
+                        threads_per_process: int | None = None, language: str = "fr",
+                        backend: str | None = None) -> list[str]:
+    """Transcrit tous les segments en parallèle et retourne les textes dans l'ordre."""
+    return list(iter_transcribe_parallel(segments_paths, model_size, processes, threads_per_process, language,
+                                         backend=backend))
+
+
+def benchmark_layouts(segments_paths, cores: int | None = None, model_size: str = "tiny",
+                      language: str = "fr", backend: str | None = None) -> dict:
+    """
+    Mesure chaque répartition processus x threads utilisant `cores` cœurs
+    et indique la plus rapide.
+    """
+    cores = cores or os.cpu_count() or 1
+    layouts = [(p, cores // p) for p in range(1, cores + 1) if cores % p == 0]
+    results = {}
+    for processes, threads in layouts:
+        start = time.perf_counter()
+        transcribe_parallel(segments_paths, model_size, processes, threads, language, backend)
+        results[(processes, threads)] = time.perf_counter() - start
+        print(f"{processes:>3} processus x {threads:>3} threads : {results[(processes, threads)]:7.1f} s")
+
+    best = min(results, key=results.get)
+    print(f"\n🏆 Meilleure configuration pour {cores} cœurs : {best[0]} processus x {best[1]} threads")
+    return {"cores": cores, "timings": results, "best": best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcrit des segments audio en parallèle sur CPU.")
+    parser.add_argument("segments", nargs="+", help="Fichiers audio à transcrire")
+    parser.add_argument("-m", "--model", default="base", help="Taille du modèle Whisper (défaut: base)")
+    parser.add_argument("-p", "--processes", type=int, help="Nombre de processus")
+    parser.add_argument("-t", "--threads", type=int, help="Threads de calcul par processus")
+    parser.add_argument("-b", "--backend", help="Moteur de transcription (whisper, whisper-int8, faster-whisper ; "
+                                                 "défaut: variable ASR_BACKEND ou whisper)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Compare toutes les répartitions processus x threads")
+    parser.add_argument("--cores", type=int, help="Nombre de cœurs pour le benchmark (défaut: tous)")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark_layouts(args.segments, args.cores, args.model, backend=args.backend)
+        return
+    for path, text in zip(args.segments, transcribe_parallel(args.segments, args.model, args.processes,
+                                                             args.threads, backend=args.backend)):
+        print(f"=== {path}\n{text}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Transcriptions horodatées.
+Les segments Whisper de chaque morceau audio sont convertis en lignes JSONL avec des
+horodatages absolus (position réelle de la coupure, silences retirés compris),
+puis peuvent être exportés en SRT ou WebVTT en une seule passe.
+"""
+
+import json
+import os
+
+COMBINED_NAME = "transcription.jsonl"
+
+
+def to_original_seconds(t: float, info: dict | None, fallback_offset: float = 0.0) -> float:
+    """
+    Convertit un temps relatif au segment (en secondes) en temps absolu dans le fichier source,
+    d'après l'entrée du manifeste de découpage (Split.read_segment_info).
+    """
+    if info is None:
+        return fallback_offset + t
+    sr = info["sample_rate"]
+    position = t * sr
+    # Réintégrer les silences retirés avant cette position
+    shift = sum(removed for at, removed in info.get("removed_spans", []) if at <= position)
+    return (info["start_sample"] + position + shift) / sr
+
+
+def timed_records(index: int, whisper_segments: list, info: dict | None, fallback_offset: float = 0.0) -> list[dict]:
+    """Lignes horodatées (temps absolus) pour les segments Whisper du morceau `index`."""
+    return [
+        {
+            "segment": index,
+            "start": round(to_original_seconds(seg["start"], info, fallback_offset), 3),
+            "end": round(to_original_seconds(seg["end"], info, fallback_offset), 3),
+            "text": seg["text"].strip(),
+        }
+        for seg in whisper_segments
+    ]
+
+
+def write_jsonl(path: str, records: list[dict]) -> None:
+    """Écrit les lignes d'un morceau de façon atomique."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_jsonl(path: str):
+    """Lit un fichier JSONL ligne par ligne."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def segment_jsonl_files(directory: str) -> list[str]:
+    """Fichiers JSONL par morceau d'un dossier de transcriptions, dans l'ordre."""
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".jsonl") and name != COMBINED_NAME
+    ]
+
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (WebVTT)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def write_srt(records, out_file) -> None:
+    for n, record in enumerate(records, 1):
+        out_file.write(f"{n}\n{format_timestamp(record['start'])} --> {format_timestamp(record['end'])}\n"
+                       f"{record['text']}\n\n")
+
+
+def write_vtt(records, out_file) -> None:
+    out_file.write("WEBVTT\n\n")
+    for record in records:
+        out_file.write(f"{format_timestamp(record['start'], '.')} --> {format_timestamp(record['end'], '.')}\n"
+                       f"{record['text']}\n\n")
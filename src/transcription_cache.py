@@ -0,0 +1,157 @@
+"""
+Cache disque des transcriptions, adressé par le contenu.
+La clé est le hash de l'audio décodé du segment, du modèle (taille et moteur), de la langue
+et des options de décodage : un segment déjà transcrit ne repasse pas dans Whisper,
+même s'il a été redécoupé ou renommé. Le cache peut vivre sur un stockage partagé.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get("TRANSCRIPTION_CACHE_DIR", os.path.join(".cache", "transcriptions"))
+MAX_BYTES = int(os.environ.get("TRANSCRIPTION_CACHE_MAX_BYTES", 1024 ** 3))
+# Après une éviction, le cache redescend à cette fraction de la limite : les écritures suivantes
+# ne relancent pas un parcours complet du dossier à chaque fois
+LOW_WATER = 0.9
+
+# Taille totale estimée de chaque dossier de cache (mesurée au premier put, puis tenue à jour)
+_totals: dict[str, int] = {}
+_totals_lock = threading.Lock()
+
+
+def cache_key(audio, model_size: str, language: str, options: dict | None = None) -> str:
+    """Hash SHA-256 de l'audio décodé (PCM float32) et des paramètres de transcription."""
+    h = hashlib.sha256()
+    h.update(memoryview(audio).cast("B"))
+    params = {"model": model_size, "language": language, "options": options or {}}
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _entry_path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def get(key: str, cache_dir: str = CACHE_DIR) -> dict | None:
+    """Retourne le résultat en cache, ou None. Un accès rafraîchit la date de l'entrée (LRU)."""
+    path = _entry_path(key, cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return result
+
+
+def put(key: str, result: dict, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES) -> None:
+    """
+    Écrit une entrée de façon atomique (fichier temporaire puis os.replace), puis applique la limite de taille.
+    La taille du cache est tenue à jour en mémoire : le dossier n'est reparcouru (evict) que lorsque
+    l'estimation dépasse max_bytes, et l'éviction redescend alors à LOW_WATER * max_bytes.
+    """
+    path = _entry_path(key, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        previous = os.path.getsize(path)
+    except OSError:
+        previous = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    with _totals_lock:
+        total = _totals.get(cache_dir)
+        if total is not None:
+            total = _totals[cache_dir] = total + size - previous
+    if total is None:
+        # Premier put sur ce dossier dans ce processus : mesure la taille réelle
+        evict(cache_dir, max_bytes)
+    elif total > max_bytes:
+        evict(cache_dir, int(max_bytes * LOW_WATER))
+
+
+def remove(key: str, cache_dir: str = CACHE_DIR) -> None:
+    """Supprime une entrée (sans erreur si elle n'existe pas)."""
+    path = _entry_path(key, cache_dir)
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    with _totals_lock:
+        if cache_dir in _totals:
+            _totals[cache_dir] -= size
+
+
+def evict(cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES) -> int:
+    """Supprime les entrées les moins récemment utilisées jusqu'à passer sous max_bytes. Retourne le nombre supprimé."""
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    # Recale l'estimation tenue par put (le cache peut être partagé avec d'autres processus)
+    with _totals_lock:
+        _totals[cache_dir] = total
+    return removed
+
+
+def model_id(model, model_size: str) -> str:
+    """Identifiant du modèle dans la clé ; les entrées du moteur openai-whisper gardent leur clé d'origine."""
+    from asr_backends import backend_of
+
+    backend = backend_of(model)
+    return model_size if backend == "whisper" else f"{model_size}:{backend}"
+
+
+def transcribe_cached(model, audio_path: str, model_size: str, language: str = "fr",
+                      cache_dir: str = CACHE_DIR, **options) -> dict:
+    """
+    Transcrit un segment en passant par le cache. L'audio n'est décodé qu'une fois :
+    le même tableau sert au calcul de la clé et, en cas d'absence, à Whisper.
+    """
+    from asr_backends import load_audio
+
+    audio = load_audio(audio_path)
+    key = cache_key(audio, model_id(model, model_size), language, options)
+    cached = get(key, cache_dir)
+    if cached is not None:
+        return cached
+
+    result = model.transcribe(audio, language=language, **options)
+    entry = {"text": result["text"], "segments": result.get("segments", []), "language": result.get("language")}
+    put(key, entry, cache_dir)
+    return entry
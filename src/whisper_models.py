@@ -0,0 +1,73 @@
+"""
+Registre des modèles Whisper chargés en mémoire.
+Un modèle (taille, moteur, device, dtype) n'est chargé qu'une fois par processus puis réutilisé
+par tous les points d'entrée ; les modèles les moins récemment utilisés sont libérés
+au-delà de `max_models`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_models = OrderedDict()
+_metrics = {}
+_lock = threading.Lock()
+max_models = 2
+
+
+def get_model(size: str = "base", device: str | None = None, dtype: str = "float32", backend: str | None = None):
+    """
+    Retourne le modèle Whisper demandé, chargé une seule fois (LRU au-delà de max_models).
+    backend choisit le moteur (asr_backends.BACKENDS, défaut : variable ASR_BACKEND).
+    dtype="float16" n'est appliqué que sur GPU ; sur CPU Whisper reste en float32.
+    """
+    # Import différé pour accélérer le démarrage
+    import asr_backends
+    import metrics
+
+    backend = backend or asr_backends.DEFAULT_BACKEND
+    device = device or asr_backends.default_device(backend)
+    key = (size, backend, device, dtype)
+
+    start = time.perf_counter()
+    with _lock:
+        if key in _models:
+            _models.move_to_end(key)
+            _metrics[key]["hits"] += 1
+            _metrics[key]["warm_load_sec"] = time.perf_counter() - start
+            return _models[key]
+
+        model = asr_backends.load(backend, size, device, dtype)
+        _metrics[key] = {"cold_load_sec": time.perf_counter() - start, "warm_load_sec": None, "hits": 0}
+        metrics.observe("model_load_seconds", _metrics[key]["cold_load_sec"], model=size, backend=backend)
+
+        _models[key] = model
+        while len(_models) > max_models:
+            evicted, _ = _models.popitem(last=False)
+            _metrics[evicted]["evicted"] = True
+        return model
+
+
+def preload(sizes=("base",), device: str | None = None, dtype: str = "float32", backend: str | None = None) -> None:
+    """Charge les modèles à l'avance pour garder un worker longue durée « chaud »."""
+    for size in sizes:
+        get_model(size, device, dtype, backend)
+
+
+def load_metrics() -> list[dict]:
+    """
+    Temps de chargement à froid et nombre de réutilisations à chaud de chaque modèle
+    demandé depuis le démarrage du processus.
+    """
+    with _lock:
+        return [
+            {"size": size, "backend": backend, "device": device, "dtype": dtype,
+             "loaded": (size, backend, device, dtype) in _models, **stats}
+            for (size, backend, device, dtype), stats in _metrics.items()
+        ]
+
+
+def clear() -> None:
+    """Libère tous les modèles chargés."""
+    with _lock:
+        _models.clear()
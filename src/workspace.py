@@ -0,0 +1,96 @@
+"""
+Espace de travail isolé par job.
+Chaque job écrit ses segments, transcriptions, résumés et son manifeste dans son propre
+dossier, et ses fichiers temporaires dans un dossier scratch (éventuellement en tmpfs)
+supprimé à la fin : plusieurs jobs peuvent tourner en même temps sur une même machine.
+Un verrou exclusif (fichier .lock, libéré par le système si le processus meurt) empêche deux
+traitements simultanés du même fichier d'écrire dans le même espace de travail.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : verrous de msvcrt
+    fcntl = None
+    import msvcrt
+
+WORKSPACE_ROOT = os.environ.get("WORKSPACE_ROOT", "jobs")
+# Ex: /dev/shm pour des fichiers temporaires en mémoire ; par défaut le dossier temporaire du système
+SCRATCH_ROOT = os.environ.get("WORKSPACE_SCRATCH") or None
+
+
+def job_id_for(input_path: str) -> str:
+    """Identifiant stable d'un job : nom du fichier + empreinte du chemin complet (permet la reprise)."""
+    digest = hashlib.sha1(os.path.abspath(input_path).encode("utf-8")).hexdigest()[:8]
+    return f"{Path(input_path).stem}_{digest}"
+
+
+def workspace_dirs(base: str) -> dict:
+    """Chemins des sorties d'un job sous `base`."""
+    return {
+        "base": base,
+        "segments": os.path.join(base, "segments_audio"),
+        "transcriptions": os.path.join(base, "transcriptions"),
+        "resumes": os.path.join(base, "resumes"),
+        "manifest": os.path.join(base, "job_manifest.json"),
+        "lock": os.path.join(base, ".lock"),
+    }
+
+
+class WorkspaceBusy(RuntimeError):
+    """L'espace de travail est déjà utilisé par un autre traitement en cours."""
+
+
+def _lock(path: str) -> int:
+    """Verrou exclusif non bloquant sur `path` ; retourne le descripteur à passer à _unlock."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        raise WorkspaceBusy(f"{os.path.dirname(path)} est déjà en cours de traitement par un autre job") from None
+    return fd
+
+
+def _unlock(fd: int) -> None:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def job_workspace(job_id: str, root: str = WORKSPACE_ROOT, scratch_root: str | None = SCRATCH_ROOT):
+    """
+    Crée l'espace de travail <root>/<job_id> et un dossier scratch privé au job,
+    supprimé en sortie (même en cas d'erreur). Les sorties du job sont conservées.
+    L'espace est verrouillé pendant le bloc : WorkspaceBusy s'il l'est déjà
+    (même fichier traité par un autre processus ou un autre job du démon).
+    """
+    ws = workspace_dirs(os.path.join(root, job_id))
+    os.makedirs(ws["base"], exist_ok=True)
+    lock_fd = _lock(ws["lock"])
+    try:
+        for key in ("segments", "transcriptions", "resumes"):
+            os.makedirs(ws[key], exist_ok=True)
+        ws["scratch"] = tempfile.mkdtemp(prefix=f"{job_id}-", dir=scratch_root)
+        try:
+            yield ws
+        finally:
+            shutil.rmtree(ws["scratch"], ignore_errors=True)
+    finally:
+        _unlock(lock_fd)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules du projet sont importés à plat depuis src/ (comme les scripts)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,33 @@
+"""Découpage en morceaux mesurés en tokens (compteur local, sans tiktoken)."""
+
+import chunking
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_long_sentence_split_within_budget_counting_each_word_once():
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return count_words(text)
+
+    sentence = " ".join(f"mot{i}" for i in range(1000))
+    pieces = list(chunking._split_long_sentence(sentence, 64, counter))
+
+    assert " ".join(pieces) == sentence
+    assert all(count_words(piece) <= 64 for piece in pieces)
+    assert [count_words(piece) for piece in pieces[:-1]] == [64] * (len(pieces) - 1)
+    # Un appel par mot (plus un par début de morceau), et non un par mot et par longueur de morceau
+    assert len(calls) <= 1000 + len(pieces)
+
+
+def test_chunk_text_respects_budget_and_sentences():
+    text = " ".join(f"Phrase numéro {i} du texte." for i in range(200))
+    chunks = chunking.chunk_text(text, max_tokens=50, count_tokens=count_words)
+
+    assert all(count_words(chunk) <= 50 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == text
@@ -0,0 +1,69 @@
+"""Nettoyage des transcriptions : boucles de répétition et recouvrements aux jonctions."""
+
+import dedupe
+
+
+def loops(text: str, **options) -> tuple[str, int]:
+    tokens = dedupe.tokenize(text)
+    tokens, _, removed = dedupe.remove_loops(tokens, dedupe._token_ids(tokens, {}), **options)
+    return " ".join(tokens), removed
+
+
+def ids(*texts: str) -> list[list[int]]:
+    vocab = {}
+    return [dedupe._token_ids(dedupe.tokenize(text), vocab) for text in texts]
+
+
+def test_short_real_repetition_is_kept():
+    assert loops("Tu es d'accord ? oui oui oui oui, bien sûr.") == ("Tu es d'accord ? oui oui oui oui, bien sûr.", 0)
+    assert loops("on y va on y va on y va") == ("on y va on y va on y va", 0)
+
+
+def test_hallucinated_loop_is_collapsed():
+    phrase = "merci d'avoir regardé cette vidéo."
+    text, removed = loops(f"Fin de la réunion. {phrase} {phrase} {phrase} {phrase}")
+    assert text == f"Fin de la réunion. {phrase}"
+    assert removed == 3 * len(phrase.split())
+
+
+def test_long_single_word_loop_is_collapsed():
+    text, removed = loops("bon " + "Merci. " * 20 + "au revoir")
+    assert text == "bon Merci. au revoir"
+    assert removed == 19
+
+
+def test_loop_thresholds_are_configurable():
+    assert loops("oui oui oui oui", min_chars=0) == ("oui", 3)
+    assert loops("oui oui oui oui", min_repeats=5, min_chars=0)[1] == 0
+
+
+def test_seam_overlap_keeps_short_common_phrase():
+    previous, current = ids("on commence et puis voilà", "et puis voilà la suite du projet")
+    assert dedupe.seam_overlap(previous, current) == 0
+
+
+def test_seam_overlap_removes_duplicated_words():
+    previous, current = ids(
+        "nous avons validé le budget pour la prochaine livraison du client",
+        "budget pour la prochaine livraison du client et le calendrier",
+    )
+    assert dedupe.seam_overlap(previous, current) == 7
+    assert dedupe.seam_overlap(previous, current, min_overlap=8) == 0
+
+
+def test_seam_overlap_ignores_case_and_punctuation():
+    previous, current = ids("Il faut livrer le produit la semaine prochaine.", "le Produit, la semaine prochaine puis")
+    assert dedupe.seam_overlap(previous, current) == 5
+
+
+def test_clean_transcriptions_stats():
+    segments = [
+        "nous avons validé le budget pour la prochaine livraison",
+        "le budget pour la prochaine livraison " + "sous-titres réalisés par la communauté " * 4,
+        "oui oui oui oui",
+    ]
+    cleaned, stats = dedupe.clean_transcriptions(segments)
+    assert cleaned == [segments[0], "sous-titres réalisés par la communauté", "oui oui oui oui"]
+    assert stats["seam_tokens_removed"] == 6
+    assert stats["loop_tokens_removed"] == 3 * 5
+    assert stats["tokens_out"] == stats["tokens_in"] - 6 - 15
@@ -0,0 +1,131 @@
+"""Cache des réponses LLM, vérifié hors ligne avec un faux fournisseur."""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_cache
+import transcription_cache
+
+
+class FakeRateLimitError(Exception):
+    """Erreur 429 simulée, avec un Retry-After en secondes."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float = 0.0):
+        super().__init__("429 Too Many Requests (simulé)")
+        self.retry_after = retry_after
+
+
+class FakeProvider:
+    """
+    Fournisseur LLM hors ligne : réponse déterministe après `latency` secondes,
+    les `fail_first` premiers appels échouent en 429. calls compte les appels réellement faits.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, retry_after: float = 0.0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self, prompt: str, text: str) -> str:
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.fail_first:
+                raise FakeRateLimitError(self.retry_after)
+        return f"résumé[{hashlib.sha256((prompt + text).encode('utf-8')).hexdigest()[:8]}]"
+
+    def summarize(self, prompt: str, text: str) -> str:
+        time.sleep(self.latency)
+        return self._next(prompt, text)
+
+    async def complete(self, prompt: str, text: str) -> str:
+        await asyncio.sleep(self.latency)
+        return self._next(prompt, text)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "ENABLED", True)
+    return str(tmp_path / "llm")
+
+
+def test_second_call_served_from_cache(cache_dir):
+    fake = FakeProvider()
+    first = llm_cache.cached("fake", "m", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir)
+    second = llm_cache.cached("fake", "m", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir)
+    assert first == second
+    assert fake.calls == 1
+
+
+def test_other_model_is_another_entry(cache_dir):
+    fake = FakeProvider()
+    llm_cache.cached("fake", "m", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir)
+    llm_cache.cached("fake", "autre", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir)
+    assert fake.calls == 2
+
+
+def test_expired_entry_is_requested_again(cache_dir):
+    fake = FakeProvider()
+    llm_cache.cached("fake", "m", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir)
+    llm_cache.cached("fake", "m", "p", "texte", lambda: fake.summarize("p", "texte"), cache_dir, ttl_sec=0)
+    assert fake.calls == 2
+
+
+def test_concurrent_identical_calls_threads(cache_dir):
+    fake = FakeProvider(latency=0.2)
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(
+            lambda _: llm_cache.cached("fake", "m", "p", "simultané", lambda: fake.summarize("p", "simultané"),
+                                       cache_dir),
+            range(8),
+        ))
+    assert len(set(responses)) == 1
+    assert fake.calls == 1
+
+
+def test_concurrent_identical_calls_asyncio(cache_dir):
+    fake = FakeProvider(latency=0.1)
+    complete = llm_cache.cached_complete(fake.complete, "fake", "m", cache_dir)
+
+    async def burst():
+        return await asyncio.gather(*(complete("p", "asyncio") for _ in range(8)))
+
+    assert len(set(asyncio.run(burst()))) == 1
+    assert fake.calls == 1
+
+
+def test_rate_limit_retried_with_retry_after(cache_dir):
+    fake = FakeProvider(fail_first=2, retry_after=0.1)
+    start = time.perf_counter()
+    llm_cache.cached("fake", "m", "p", "429", lambda: fake.summarize("p", "429"), cache_dir, base_delay=0.01)
+    assert fake.calls == 3
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_permanent_error_not_retried(cache_dir):
+    attempts = []
+
+    def invalid_request():
+        attempts.append(1)
+        raise ValueError("erreur définitive (simulée)")
+
+    with pytest.raises(ValueError):
+        llm_cache.cached("fake", "m", "p", "erreur", invalid_request, cache_dir)
+    assert len(attempts) == 1
+
+
+def test_eviction_by_size(cache_dir):
+    fake = FakeProvider()
+    for text in ("a", "b", "c"):
+        llm_cache.cached("fake", "m", "p", text, lambda: fake.summarize("p", text), cache_dir)
+    assert llm_cache.stats(cache_dir)["entries"] == 3
+    transcription_cache.evict(cache_dir, 0)
+    assert llm_cache.stats(cache_dir)["entries"] == 0
@@ -0,0 +1,100 @@
+"""Résumé map-reduce : arbre de réduction, concurrence bornée, serveur local compatible OpenAI, modèle local."""
+
+import asyncio
+
+import pytest
+
+import summarizer
+
+
+def fake_complete(calls, delay=0.0):
+    """Fonction `complete` hors ligne : enregistre (prompt, texte) et la concurrence atteinte."""
+    state = {"active": 0, "peak": 0}
+
+    async def complete(prompt, text):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        calls.append((prompt, text))
+        await asyncio.sleep(delay)
+        state["active"] -= 1
+        return f"[{text}]"
+
+    return complete, state
+
+
+def test_map_reduce_tree_depth_and_order():
+    calls = []
+    complete, _ = fake_complete(calls)
+    chunks = [f"c{i}" for i in range(20)]
+    result = asyncio.run(summarizer.map_reduce(chunks, complete, concurrency=4, fan_in=4))
+
+    prompts = [prompt for prompt, _ in calls]
+    # 20 morceaux → 5 résumés partiels → 2 → résumé global
+    assert prompts.count(summarizer.MAP_PROMPT) == 20
+    assert prompts.count(summarizer.REDUCE_PROMPT) == 5 + 2
+    assert prompts.count(summarizer.GLOBAL_PROMPT) == 1
+    # L'ordre des morceaux est conservé jusqu'au résumé global
+    assert result.index("[c0]") < result.index("[c5]") < result.index("[c19]")
+
+
+def test_map_reduce_single_chunk_and_empty():
+    calls = []
+    complete, _ = fake_complete(calls)
+    assert asyncio.run(summarizer.map_reduce([], complete)) == ""
+    assert asyncio.run(summarizer.map_reduce(["seul"], complete)) == "[seul]"
+    assert calls == [(summarizer.GLOBAL_PROMPT, "seul")]
+
+
+def test_map_chunks_bounded_concurrency():
+    calls = []
+    complete, state = fake_complete(calls, delay=0.01)
+    asyncio.run(summarizer.map_chunks([str(i) for i in range(30)], complete, concurrency=3))
+    assert state["peak"] == 3
+
+
+def peak_concurrency(log) -> int:
+    """Nombre maximal de requêtes traitées en même temps d'après le journal du faux serveur."""
+    edges = sorted([(start, 1) for _, start, _ in log] + [(end, -1) for _, _, end in log])
+    active = peak = 0
+    for _, step in edges:
+        active += step
+        peak = max(peak, active)
+    return peak
+
+
+def test_summarize_map_reduce_against_local_server():
+    pytest.importorskip("openai")
+    from bench_pipeline import stub_llm_server
+
+    log = []
+    chunks = [f"passage {i} " * 10 for i in range(12)]
+    with stub_llm_server(latency_sec=0.02, log=log) as base_url:
+        result = summarizer.summarize_map_reduce(chunks, api_key="local", base_url=base_url, model="stub",
+                                                 concurrency=4, fan_in=8, cache=False)
+
+    assert result
+    # 12 appels map, 2 réductions, 1 résumé global, au plus 4 requêtes simultanées
+    assert len(log) == 12 + 2 + 1
+    assert 1 < peak_concurrency(log) <= 4
+    assert all(body["model"] == "stub" for body, _, _ in log)
+
+
+def test_local_summarizer_batches_through_pipeline(monkeypatch):
+    pytest.importorskip("torch")
+    import local_summarizer
+
+    batches = []
+
+    class FakePipeline:
+        def __call__(self, chunks, batch_size, **options):
+            batches.append((len(chunks), batch_size, options["truncation"]))
+            return [{"summary_text": chunk.upper()} for chunk in chunks]
+
+    monkeypatch.setitem(local_summarizer._pipelines, (local_summarizer.DEFAULT_MODEL, False), FakePipeline())
+    complete = summarizer.sync_complete(
+        lambda text: local_summarizer.summarize_chunks([text], batch_size=4)[0]
+    )
+
+    assert local_summarizer.summarize_chunks(["a", "b", "c"], batch_size=4) == ["A", "B", "C"]
+    assert batches == [(3, 4, True)]
+    assert asyncio.run(summarizer.map_reduce(["x", "y"], complete)) == "X\n\nY"